@@ -0,0 +1,56 @@
+"""
+Cold vs. cached schema generation for nested tool schemas.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_schema_cache
+"""
+
+import timeit
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from fast_agents.helpers.schema_helper import format_parameters, clear_schema_cache, _build_parameters
+
+
+class Address(BaseModel):
+    street: str
+    city: str
+    country: str = Field(..., description="ISO country code.")
+
+
+class Contact(BaseModel):
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    addresses: list[Address] = []
+
+
+class Order(BaseModel):
+    id: str
+    items: list[str]
+    shipping: Address
+    billing: Optional[Address] = None
+
+
+class CreateCustomerSchema(BaseModel):
+    name: str
+    contact: Contact
+    orders: list[Order] = []
+    tags: dict[str, str] = {}
+
+
+def main(number: int = 2000) -> None:
+    cold = timeit.timeit(lambda: _build_parameters(CreateCustomerSchema), number=number)
+
+    clear_schema_cache()
+    format_parameters(CreateCustomerSchema)
+    cached = timeit.timeit(lambda: format_parameters(CreateCustomerSchema), number=number)
+
+    print(f"cold:   {cold / number * 1e6:9.2f} us/call")
+    print(f"cached: {cached / number * 1e6:9.2f} us/call")
+    print(f"speedup: {cold / cached:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
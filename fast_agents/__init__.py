@@ -11,9 +11,20 @@ from fast_agents.tool import Tool
 from fast_agents.tool_response import ToolResponse
 from fast_validation import Schema, ValidatorRule, ValidationRuleException
 from fast_agents.thread import Thread
+from fast_agents.history import History
+from fast_agents.compactor import Compactor, AgentCompactor, LocalCompactor
 from fast_agents.run_context import RunContext
 from fast_agents.llm_context import LlmContext
 from fast_agents.hook import Hook
+from fast_agents.client_provider import ClientProvider
+from fast_agents.tool_scheduler import ToolScheduler
+from fast_agents.output_budget import OutputBudget, BlobStore, LocalBlobStore
+from fast_agents.rate_limiter import RateLimiter
+from fast_agents.retry_policy import RetryPolicy, StreamRetryEvent
+from fast_agents.hedge_policy import HedgePolicy
+from fast_agents.batch_runner import BatchRunner, BatchItem, BatchResult
+from fast_agents.batch_api import BatchApiRunner
+from fast_agents.checkpoint import Checkpointer, CheckpointStore, FileCheckpointStore, SqliteCheckpointStore
 from fast_agents.exceptions import (
     ToolValidationException,
     MaxTurnsReachedException,
@@ -37,9 +48,30 @@ __all__ = [
     "ValidatorRule",
     "ValidationRuleException",
     "Thread",
+    "History",
+    "Compactor",
+    "AgentCompactor",
+    "LocalCompactor",
     "RunContext",
     "LlmContext",
     "Hook",
+    "ClientProvider",
+    "ToolScheduler",
+    "OutputBudget",
+    "BlobStore",
+    "LocalBlobStore",
+    "RateLimiter",
+    "RetryPolicy",
+    "StreamRetryEvent",
+    "HedgePolicy",
+    "BatchRunner",
+    "BatchItem",
+    "BatchResult",
+    "BatchApiRunner",
+    "Checkpointer",
+    "CheckpointStore",
+    "FileCheckpointStore",
+    "SqliteCheckpointStore",
 
     # Exceptions
     "ToolValidationException",
@@ -3,25 +3,39 @@ from __future__ import annotations
 from typing import Optional, Type
 
 from openai.types import ReasoningEffort
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr
 
 from fast_agents.helpers.handoffs_helper import HandoffTool
 from fast_agents.tool import Tool
+from fast_agents.tool_registry import ToolRegistry
 
 
 class Agent(BaseModel):
     name: str = Field("agent")
     instructions: str = Field("You are a helpful assistant.")
     model: str = Field("gpt-5.1", description="Default model to use.")
+    fallback_models: list[str] = Field([], description="Models tried in order when the model is overloaded. Used by threads with a retry_policy.")
     tools: list[Tool | dict] = Field([], description="List of tools available. Can be a list of Tool objects or a list of native tool like code_interpreter, web_search_preview, image_generation.")
     output_type: Optional[Type[BaseModel]] = Field(None, description="Structured output.")
     temperature: Optional[float] = Field(None, description="Value between 0 and 2. Reasoning models don't support temperature.")
     reasoning_effort: Optional[ReasoningEffort] = Field(None, description="Reasoning effort for reasoning-capable models.")
 
+    _tool_registry: Optional[ToolRegistry] = PrivateAttr(None)
+
     model_config = ConfigDict(
         arbitrary_types_allowed=True
     )
 
+    @property
+    def tool_registry(self) -> ToolRegistry:
+        """
+        Compiled tools of this agent, rebuilt only when `tools` or `output_type` change.
+        """
+        registry = self._tool_registry
+        if registry is None or not registry.is_valid_for(self.tools, self.output_type):
+            registry = self._tool_registry = ToolRegistry(self.tools, self.output_type)
+        return registry
+
     def as_handoff_tool(self) -> HandoffTool:
         tool = HandoffTool()
         tool.name = tool.name.replace("<agent_name>", self.name)
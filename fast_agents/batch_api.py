@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+from typing import Any, Iterable, Optional
+
+from openai import AsyncOpenAI
+from openai.types.responses import Response
+
+from fast_agents.batch_runner import BatchResult, serialize_output
+from fast_agents.client_provider import ClientProvider, default_client_provider
+from fast_agents.exceptions import BatchRequestFailedException
+from fast_agents.helpers.function_helper import json_default
+from fast_agents.run_context import RunContext
+from fast_agents.thread import Thread
+
+# Batch statuses after which no more results will arrive
+_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def batch_request_line(custom_id: str, params: dict) -> str:
+    """
+    One line of a Batch API input file for a Responses API request.
+    """
+    body = {key: value for key, value in params.items() if value is not None}
+    return json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/responses", "body": body}, default=json_default)
+
+
+class BatchApiRunner:
+    """
+    Runs threads through the OpenAI Batch API instead of synchronous requests, for offline workloads.
+
+    Every round collects the next request of all unfinished threads into one JSONL batch file and submits it.
+    When the batch completes, each thread records its response and executes its tool calls as usual,
+    then the threads that need another turn go into the next batch.
+    Batches can take up to `completion_window` to complete, so this is not meant for interactive use.
+    """
+
+    def __init__(self,
+                 client: Optional[AsyncOpenAI] = None,   # Defaults to the shared pooled client of `client_provider`
+                 client_provider: Optional[ClientProvider] = None,
+                 poll_interval: float = 30.0,   # seconds between batch status checks
+                 completion_window: str = "24h",
+                 metadata: Optional[dict[str, str]] = None   # attached to every submitted batch
+                 ):
+        self.client = client
+        self.client_provider = client_provider or default_client_provider
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.metadata = metadata
+        self.batch_ids: list[str] = []   # submitted batches, in order
+
+    async def submit(self, lines: list[str]) -> Any:
+        file = await self.client.files.create(file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch")
+        params = dict(input_file_id=file.id, endpoint="/v1/responses", completion_window=self.completion_window)
+        if self.metadata:
+            params["metadata"] = self.metadata
+        batch = await self.client.batches.create(**params)
+        self.batch_ids.append(batch.id)
+        return batch
+
+    async def wait(self, batch: Any) -> Any:
+        while batch.status not in _FINAL_STATUSES:
+            await asyncio.sleep(self.poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+        return batch
+
+    async def download(self, file_id: Optional[str]) -> list[dict]:
+        if not file_id:
+            return []
+        content = await self.client.files.content(file_id)
+        return [json.loads(line) for line in content.text.splitlines() if line.strip()]
+
+    async def results(self, batch: Any) -> dict[str, Response | Exception]:
+        """
+        Responses of a finished batch by custom_id; failed requests map to an exception.
+        """
+        results: dict[str, Response | Exception] = {}
+        for record in await self.download(batch.output_file_id) + await self.download(getattr(batch, "error_file_id", None)):
+            response = record.get("response") or {}
+            if response.get("status_code") == 200:
+                results[record["custom_id"]] = Response.model_validate(response["body"])
+            else:
+                error = record.get("error") or response.get("body", {}).get("error") or response
+                results[record["custom_id"]] = BatchRequestFailedException(str(error))
+        return results
+
+    async def _finish_turn(self, thread: Thread, run_context: RunContext, response: Response) -> bool:
+        """
+        Record a response and execute its tool calls, checkpointing like a synchronous turn.
+        Returns True when the thread needs another turn.
+        """
+        function_calls = await thread.end_turn(run_context, response)
+        thread.checkpoint()
+        if not function_calls:
+            return False
+        async for _ in thread.execute_tool_calls(function_calls, run_context):
+            pass
+        thread.checkpoint()
+        return True
+
+    async def run(self, threads: Iterable[Thread]) -> list[BatchResult]:
+        """
+        Run threads to completion. Results are in thread order with the thread index as id.
+        """
+        if not self.client:
+            self.client = self.client_provider.get()
+
+        threads = list(threads)
+        started = time.monotonic()
+        results: dict[int, BatchResult] = {}
+        active = list(range(len(threads)))
+
+        def fail(index: int, error: Exception) -> None:
+            results[index] = BatchResult(id=str(index), error=f"{type(error).__name__}: {error}", turns=threads[index].turn_count,
+                                         duration=time.monotonic() - started)
+
+        while active:
+            turns: dict[str, tuple[int, RunContext]] = {}
+            lines = []
+            for index in active:
+                thread = threads[index]
+                thread.client = self.client
+                try:
+                    run_context, params = await thread.start_turn()
+                except Exception as e:
+                    fail(index, e)
+                    continue
+                custom_id = f"{index}-{thread.turn_count}"
+                turns[custom_id] = (index, run_context)
+                lines.append(batch_request_line(custom_id, params))
+
+            if not lines:
+                break
+
+            batch = await self.wait(await self.submit(lines))
+            responses = await self.results(batch)
+
+            async def finish(custom_id: str, index: int, run_context: RunContext) -> Optional[int]:
+                response = responses.get(custom_id, BatchRequestFailedException(f"Batch {batch.id} ended with status {batch.status} without a result"))
+                if isinstance(response, Exception):
+                    fail(index, response)
+                    return None
+
+                thread = threads[index]
+                try:
+                    if await self._finish_turn(thread, run_context, response):
+                        return index
+
+                    output = response.output[-1] if response.output else None
+                    if thread.agent.output_type:
+                        output = await thread.parse_structured_output(output)
+                    results[index] = BatchResult(id=str(index), output=serialize_output(output), turns=thread.turn_count,
+                                                 duration=time.monotonic() - started)
+                except Exception as e:
+                    fail(index, e)
+                return None
+
+            next_active = await asyncio.gather(*[finish(custom_id, index, run_context) for custom_id, (index, run_context) in turns.items()])
+            active = [index for index in next_active if index is not None]
+
+        return [results[index] for index in range(len(threads))]
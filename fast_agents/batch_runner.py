@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Callable, Iterable, Optional
+
+import openai
+from openai import AsyncOpenAI
+from pydantic import BaseModel, Field, ValidationError
+
+from fast_agents.client_provider import ClientProvider, default_client_provider
+from fast_agents.helpers.function_helper import response_to_dict, string_to_user_message
+from fast_agents.thread import Thread
+
+if TYPE_CHECKING:
+    from fast_agents.agent import Agent
+
+
+class BatchItem(BaseModel):
+    id: str = Field(..., description="Unique id of the item, used to skip completed items on resume.")
+    input: str | list[Any] = Field(..., description="User message or list of input items of the thread.")
+
+
+class BatchResult(BaseModel):
+    id: str
+    output: Any = Field(None, description="Final output of the thread in JSON serializable form.")
+    error: Optional[str] = Field(None, description="Error message when the thread failed.")
+    duration: float = Field(0.0, description="Seconds the thread took.")
+    turns: int = Field(0, description="Turns the thread took.")
+
+
+class BatchStats(BaseModel):
+    completed: int = 0
+    failed: int = 0
+    skipped: int = Field(0, description="Items already completed in the checkpoint.")
+    in_flight: int = 0
+    started_at: float = Field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """
+        Finished items per second.
+        """
+        elapsed = self.elapsed
+        return (self.completed + self.failed) / elapsed if elapsed > 0 else 0.0
+
+
+def serialize_output(output: Any) -> Any:
+    """
+    JSON serializable form of a thread's final output: the model of structured output, the text of a message or a dict.
+    """
+    if output is None or isinstance(output, (str, int, float, bool, dict, list)):
+        return output
+    if isinstance(output, BaseModel) and not isinstance(output, openai.BaseModel):
+        return output.model_dump(mode="json")   # structured output
+
+    content = getattr(output, "content", None)
+    if isinstance(content, list) and content:
+        text = getattr(content[0], "text", None)
+        if text is None and isinstance(content[0], dict):
+            text = content[0].get("text")
+        if text is not None:
+            return text
+    return response_to_dict(output)
+
+
+class BatchRunner:
+    """
+    Runs many threads of one agent with bounded concurrency on a shared client.
+
+    Results are yielded in completion order. With `checkpoint_path`, every result is appended to a JSONL file
+    and ids that already succeeded there are skipped, so an interrupted batch continues where it stopped.
+    Input is read lazily, only as fast as slots free up.
+    """
+
+    def __init__(self,
+                 agent: 'Agent',
+                 max_concurrency: int = 16,   # threads running at once
+                 client: Optional[AsyncOpenAI] = None,   # Defaults to the shared pooled client of `client_provider`
+                 client_provider: Optional[ClientProvider] = None,
+                 checkpoint_path: Optional[str | Path] = None,   # JSONL file of results, also used to resume
+                 progress: Optional[Callable[[BatchStats], None]] = None,   # called after each finished item
+                 **thread_kwargs: Any   # passed to every Thread (max_turns, rate_limiter, retry_policy, ...)
+                 ):
+        self.agent = agent
+        self.max_concurrency = max_concurrency
+        self.client = client
+        self.client_provider = client_provider or default_client_provider
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.progress = progress
+        self.thread_kwargs = thread_kwargs
+        self.stats = BatchStats()
+
+    @staticmethod
+    def to_item(raw: Any, index: int) -> BatchItem:
+        """
+        BatchItem of a raw item. Raises ValidationError for items that are none of the accepted forms.
+        """
+        if isinstance(raw, BatchItem):
+            return raw
+        if isinstance(raw, dict) and ("role" in raw or "type" in raw):
+            return BatchItem(id=str(index), input=[raw])   # a single input item
+        if isinstance(raw, dict):
+            input = raw.get("input")
+            return BatchItem(id=str(raw.get("id", index)), input=[input] if isinstance(input, dict) else input)
+        return BatchItem(id=str(index), input=raw)
+
+    @staticmethod
+    def invalid_result(raw: Any, index: int, error: ValidationError) -> BatchResult:
+        item_id = raw.get("id", index) if isinstance(raw, dict) else index
+        return BatchResult(id=str(item_id), error=f"Invalid item: {error.errors(include_url=False)}")
+
+    def completed_ids(self) -> set[str]:
+        """
+        Ids of items that succeeded according to the checkpoint file.
+        """
+        if not self.checkpoint_path or not self.checkpoint_path.exists():
+            return set()
+
+        ids = set()
+        with self.checkpoint_path.open() as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # partially written last line of an interrupted run
+                if not record.get("error"):
+                    ids.add(record["id"])
+        return ids
+
+    def open_checkpoint(self):
+        """
+        Open the checkpoint file for appending. A torn last line of an interrupted run is ended first,
+        so the next record starts on a line of its own.
+        """
+        torn = False
+        if self.checkpoint_path.exists() and self.checkpoint_path.stat().st_size:
+            with self.checkpoint_path.open("rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+
+        checkpoint = self.checkpoint_path.open("a")
+        if torn:
+            checkpoint.write("\n")
+        return checkpoint
+
+    def create_thread(self, item: BatchItem, client: AsyncOpenAI) -> Thread:
+        input = [string_to_user_message(item.input)] if isinstance(item.input, str) else item.input
+        return Thread(agent=self.agent, input=input, client=client, **self.thread_kwargs)
+
+    async def run_item(self, item: BatchItem, client: AsyncOpenAI) -> BatchResult:
+        started = time.monotonic()
+        thread = self.create_thread(item, client)
+        try:
+            output = await thread.run_to_completion()
+            return BatchResult(id=item.id, output=serialize_output(output), duration=time.monotonic() - started, turns=thread.turn_count)
+        except Exception as e:
+            return BatchResult(id=item.id, error=f"{type(e).__name__}: {e}", duration=time.monotonic() - started, turns=thread.turn_count)
+
+    def record(self, result: BatchResult, checkpoint) -> None:
+        if result.error:
+            self.stats.failed += 1
+        else:
+            self.stats.completed += 1
+
+        if checkpoint:
+            checkpoint.write(result.model_dump_json() + "\n")
+            checkpoint.flush()
+        if self.progress:
+            self.progress(self.stats)
+
+    async def run(self, items: Iterable[Any] | AsyncIterable[Any]) -> AsyncIterator[BatchResult]:
+        """
+        Run a thread for every item (a BatchItem, a {"id", "input"} dict, a user message, an input item or a list
+        of input items) and yield the results as threads finish. Invalid items yield a failed result.
+        """
+        client = self.client or self.client_provider.get()
+        done_ids = self.completed_ids()
+        iterator = _aiter(items)
+        self.stats = BatchStats()
+
+        pending: set[asyncio.Task] = set()
+        exhausted = False
+        index = 0
+        checkpoint = self.open_checkpoint() if self.checkpoint_path else None
+        try:
+            while True:
+                while not exhausted and len(pending) < self.max_concurrency:
+                    try:
+                        raw = await anext(iterator)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+
+                    try:
+                        item = self.to_item(raw, index)
+                    except ValidationError as e:
+                        # One malformed line fails alone, the batch goes on
+                        result = self.invalid_result(raw, index, e)
+                        index += 1
+                        self.record(result, checkpoint)
+                        yield result
+                        continue
+                    index += 1
+                    if item.id in done_ids:
+                        self.stats.skipped += 1
+                        continue
+                    pending.add(asyncio.create_task(self.run_item(item, client)))
+
+                self.stats.in_flight = len(pending)
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                self.stats.in_flight = len(pending)
+                for task in done:
+                    result = task.result()
+                    self.record(result, checkpoint)
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            if checkpoint:
+                checkpoint.close()
+
+    async def run_jsonl(self, path: str | Path) -> AsyncIterator[BatchResult]:
+        """
+        Run items of a JSONL file, one {"id": ..., "input": ...} object per line.
+        """
+        async for result in self.run(read_jsonl(path)):
+            yield result
+
+
+def read_jsonl(path: str | Path) -> Iterable[dict]:
+    with Path(path).open() as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _aiter(items: Iterable[Any] | AsyncIterable[Any]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import queue
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel, Field
+
+from fast_agents.helpers.function_helper import json_default
+
+
+class CheckpointStore(ABC):
+    """
+    Append-only storage of encoded checkpoint records, one log per thread id.
+    Called from the checkpointer's writer thread only.
+    """
+
+    @abstractmethod
+    def append_many(self, records: list[tuple[str, str]]) -> None:
+        """
+        Append (thread_id, line) records, in order.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def read(self, thread_id: str) -> Iterable[str]:
+        raise NotImplementedError
+
+    def validate_thread_id(self, thread_id: str) -> None:
+        """
+        Raise ValueError for ids the store cannot hold. Called before records are queued.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    One JSON-lines file per thread in `directory`.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def validate_thread_id(self, thread_id: str) -> None:
+        # Ids become file names, they must not reach outside the directory
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", thread_id):
+            raise ValueError(f"Invalid thread id for a file checkpoint: {thread_id!r}")
+
+    def path_for(self, thread_id: str) -> Path:
+        self.validate_thread_id(thread_id)
+        return self.directory / f"{thread_id}.jsonl"
+
+    def append_many(self, records: list[tuple[str, str]]) -> None:
+        by_thread: dict[str, list[str]] = defaultdict(list)
+        for thread_id, line in records:
+            by_thread[thread_id].append(line)
+        for thread_id, lines in by_thread.items():
+            with self.path_for(thread_id).open("a") as f:
+                f.write("".join(line + "\n" for line in lines))
+
+    def read(self, thread_id: str) -> Iterable[str]:
+        path = self.path_for(thread_id)
+        if not path.exists():
+            return []
+        return path.read_text().splitlines()
+
+
+class SqliteCheckpointStore(CheckpointStore):
+    """
+    All threads in one SQLite database, each batch of records written in a single transaction.
+    """
+
+    def __init__(self, path: str | Path):
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints (seq INTEGER PRIMARY KEY AUTOINCREMENT, thread_id TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS checkpoints_thread ON checkpoints (thread_id, seq)")
+        self.connection.commit()
+        self._lock = threading.Lock()
+
+    def append_many(self, records: list[tuple[str, str]]) -> None:
+        with self._lock, self.connection:
+            self.connection.executemany("INSERT INTO checkpoints (thread_id, record) VALUES (?, ?)", records)
+
+    def read(self, thread_id: str) -> Iterable[str]:
+        with self._lock:
+            rows = self.connection.execute("SELECT record FROM checkpoints WHERE thread_id = ? ORDER BY seq", (thread_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class ThreadState(BaseModel):
+    input: list[Any] = Field(default_factory=list, description="Input items of the thread.")
+    agent_name: Optional[str] = Field(None, description="Name of the agent running the thread, changes with handoffs.")
+    turn_count: int = 0
+    tool_outputs: dict[str, list[Any]] = Field(default_factory=dict, description="Output items of completed tool calls by call_id.")
+
+
+class Checkpointer:
+    """
+    Persists thread state to a CheckpointStore without blocking the thread.
+
+    Records are queued and written by a background thread in batches, so a checkpoint costs a queue put on the
+    event loop. Each thread log is an append-only sequence of records:
+    - "items": input items added since the previous record (or a full snapshot when the history was rewritten),
+      with the current agent name and turn count,
+    - "tool_output": output items of a tool call, written as soon as the call completes.
+    Use `flush()` to wait until everything queued so far is stored.
+
+    When a batch fails, each thread's records are written separately, so one failing log does not lose the
+    records of the others. Records of a failing thread are retried with its next records, or on `flush()`.
+    Replaying a record twice gives the same state, so a partly written batch may be written again.
+    """
+
+    def __init__(self,
+                 store: CheckpointStore,
+                 max_attempts: int = 3   # writes of a thread's records before they are dropped
+                 ):
+        self.store = store
+        self.max_attempts = max_attempts
+        self.error: Optional[Exception] = None   # last error of the writer thread
+        self._failed: dict[str, tuple[list[str], int]] = {}   # thread_id -> (lines not written yet, failed attempts)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._write_loop, name="fast-agents-checkpointer", daemon=True)
+                    self._worker.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            entries = [self._queue.get()]
+            while not self._queue.empty():
+                entries.append(self._queue.get())
+
+            records, events, stop = [], [], False
+            for entry in entries:
+                if entry is None:
+                    stop = True
+                elif isinstance(entry, threading.Event):
+                    events.append(entry)
+                else:
+                    thread_id, record = entry
+                    records.append((thread_id, json.dumps(record, default=json_default)))
+
+            if records or self._failed:
+                self._append(records)
+            for event in events:
+                event.set()
+            if stop:
+                return
+
+    def _append(self, records: list[tuple[str, str]]) -> None:
+        if not self._failed:
+            try:
+                self.store.append_many(records)
+                return
+            except Exception as e:
+                self.error = e
+
+        by_thread: dict[str, list[str]] = {thread_id: lines for thread_id, (lines, _) in self._failed.items()}
+        for thread_id, line in records:
+            by_thread.setdefault(thread_id, []).append(line)
+
+        for thread_id, lines in by_thread.items():
+            try:
+                self.store.append_many([(thread_id, line) for line in lines])
+                self._failed.pop(thread_id, None)
+            except Exception as e:
+                self.error = e
+                attempts = self._failed.get(thread_id, (None, 0))[1] + 1
+                if attempts < self.max_attempts:
+                    self._failed[thread_id] = (lines, attempts)
+                else:
+                    self._failed.pop(thread_id, None)
+
+    def validate_thread_id(self, thread_id: str) -> None:
+        self.store.validate_thread_id(thread_id)
+
+    def write(self, thread_id: str, record: dict) -> None:
+        self.validate_thread_id(thread_id)
+        self._ensure_worker()
+        self._queue.put((thread_id, record))
+
+    async def flush(self) -> None:
+        """
+        Wait until all records queued so far are written, retrying records of failed writes once more.
+        Raises the error of a failed write.
+        """
+        if self._worker is None:
+            return
+        event = threading.Event()
+        self._queue.put(event)
+        await asyncio.to_thread(event.wait)
+        if self.error:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self) -> None:
+        """
+        Write what is queued, stop the writer thread and close the store.
+        """
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+        self.store.close()
+
+    def restore(self, thread_id: str) -> Optional[ThreadState]:
+        """
+        Replay the log of a thread. Returns None when nothing was checkpointed for it.
+        """
+        lines = list(self.store.read(thread_id))
+        if not lines:
+            return None
+
+        state = ThreadState()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue   # torn last write
+            if record["type"] == "items":
+                state.input = state.input[:record["start"]] + record["items"]
+                state.agent_name = record.get("agent", state.agent_name)
+                state.turn_count = record.get("turn_count", state.turn_count)
+            elif record["type"] == "tool_output":
+                state.tool_outputs[record["call_id"]] = record["items"]
+        return state
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import importlib
 import os
 import sys
@@ -9,7 +10,7 @@ from types import ModuleType
 from typing import Any
 
 from fast_agents.agent import Agent
-from fast_agents.tui import FastAgentsTUI
+from fast_agents.batch_runner import BatchRunner, BatchStats
 
 
 def _ensure_cwd_on_sys_path() -> None:
@@ -46,6 +47,43 @@ def _resolve_agent(obj: Any) -> Agent:
     raise TypeError("Provided symbol must be an Agent instance, Agent subclass, or a factory returning Agent")
 
 
+def _print_progress(stats: BatchStats) -> None:
+    print(
+        f"\rcompleted {stats.completed}  failed {stats.failed}  skipped {stats.skipped}  "
+        f"in flight {stats.in_flight}  {stats.throughput:.2f} items/s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+async def _run_batch(agent: Agent, args: argparse.Namespace) -> BatchStats:
+    runner = BatchRunner(
+        agent=agent,
+        max_concurrency=args.concurrency,
+        checkpoint_path=args.output,
+        progress=_print_progress,
+        max_turns=args.max_turns,
+    )
+    async for _ in runner.run_jsonl(args.input):
+        pass
+    return runner.stats
+
+
+def _import_agent(import_path: str) -> Agent:
+    try:
+        symbol = _locate_symbol(import_path)
+    except ModuleNotFoundError as e:
+        print(
+            "Could not import module. Ensure you are running from your project root "
+            "or add it to PYTHONPATH. Error:",
+            e,
+        )
+        raise
+
+    return _resolve_agent(symbol)
+
+
 def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(prog="fast-agents")
     sub = parser.add_subparsers(dest="command", required=True)
@@ -53,27 +91,32 @@ def main(argv: list[str] | None = None) -> None:
     run_p = sub.add_parser("run", help="Run a TUI chat with an Agent")
     run_p.add_argument("import_path", help="Import path to Agent (e.g. pkg.module:agent)")
 
+    batch_p = sub.add_parser("batch", help="Run an Agent over a JSONL file of inputs")
+    batch_p.add_argument("import_path", help="Import path to Agent (e.g. pkg.module:agent)")
+    batch_p.add_argument("input", help='JSONL file with one {"id": ..., "input": ...} object per line')
+    batch_p.add_argument("-o", "--output", required=True, help="JSONL file of results, rerun to resume")
+    batch_p.add_argument("-c", "--concurrency", type=int, default=16, help="Threads running at once")
+    batch_p.add_argument("--max-turns", type=int, default=20)
+
     args = parser.parse_args(argv)
 
     if args.command == "run":
-        try:
-            symbol = _locate_symbol(args.import_path)
-        except ModuleNotFoundError as e:
-            missing = getattr(e, "name", None)
-            print(
-                "Could not import module. Ensure you are running from your project root "
-                "or add it to PYTHONPATH. Error:",
-                e,
-            )
-            raise
-
-        agent = _resolve_agent(symbol)
+        from fast_agents.tui import FastAgentsTUI   # textual is only needed for the TUI
 
         app = FastAgentsTUI(
-            agent=agent
+            agent=_import_agent(args.import_path)
         )
         app.run()
 
+    elif args.command == "batch":
+        stats = asyncio.run(_run_batch(_import_agent(args.import_path), args))
+        print(file=sys.stderr)
+        print(
+            f"Done in {stats.elapsed:.1f}s: {stats.completed} completed, {stats.failed} failed, "
+            f"{stats.skipped} skipped ({stats.throughput:.2f} items/s)",
+            file=sys.stderr,
+        )
+
 
 if __name__ == "__main__":
     main()
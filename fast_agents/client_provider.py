@@ -0,0 +1,62 @@
+import asyncio
+import weakref
+from typing import Optional, Any
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ClientProvider:
+    """
+    Hands out one shared, pooled AsyncOpenAI client per event loop.
+    Threads use `default_client_provider` unless a client or another provider is passed to them.
+    """
+
+    def __init__(self,
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 http2: Optional[bool] = None,   # None = use HTTP/2 when the `h2` package is installed
+                 **client_kwargs: Any   # passed to AsyncOpenAI (api_key, base_url, timeout, max_retries, ...)
+                 ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = _http2_available() if http2 is None else http2
+        self.client_kwargs = client_kwargs
+        # Clients are bound to the loop their connections were opened on
+        self._clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]' = weakref.WeakKeyDictionary()
+
+    def create_client(self) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            http_client=DefaultAsyncHttpxClient(limits=self.limits, http2=self.http2),
+            **self.client_kwargs
+        )
+
+    def get(self) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self.create_client()
+        return client
+
+    async def aclose(self) -> None:
+        """
+        Close the client of the running event loop. A new one is created on next `get()`.
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+default_client_provider = ClientProvider()
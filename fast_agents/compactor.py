@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional
+
+from fast_agents.helpers.function_helper import string_to_user_message
+from fast_agents.helpers.single_flight import SingleFlight
+from fast_agents.helpers.tokenisor import encoding_name_for_model, get_encoding
+from fast_agents.history import History
+
+if TYPE_CHECKING:
+    from fast_agents.agent import Agent
+    from fast_agents.thread import Thread
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def render_item(item: dict) -> str:
+    """
+    Plain text line of a history item for a summarizer. Reasoning items are left out.
+    """
+    item_type = item.get("type", "message")
+    if item_type == "function_call":
+        return f"[tool call] {item.get('name')}({item.get('arguments')})"
+    if item_type == "function_call_output":
+        return f"[tool output] {item.get('output')}"
+    if item_type != "message":
+        return ""
+
+    content = item.get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return f"{item.get('role', 'user')}: {content}"
+
+
+def render_transcript(items: list) -> str:
+    return "\n".join(line for line in map(render_item, items) if line)
+
+
+class Compactor(ABC):
+    """
+    Replaces the oldest part of a thread's history with a single summary item once the history exceeds `max_tokens`.
+
+    The most recent `keep_tokens` are kept verbatim; everything before them is summarized, including the summary
+    of a previous compaction. The cut never separates a function call from its output. The summary is cut to
+    the tokens left next to the kept items, so the compacted history fits into `max_tokens`.
+    Summaries are cached by a hash of the summarized items and concurrent compactions of the same items
+    (e.g. forks) share one `summarize()` call.
+    Without `max_tokens` the thread's max_input_tokens is used; the summary item is always sent, also when
+    the max_input_tokens window drops items after it.
+    """
+
+    def __init__(self,
+                 max_tokens: Optional[int] = None,   # history size that triggers compaction, defaults to Thread.max_input_tokens
+                 keep_tokens: Optional[int] = None,   # recent history kept verbatim, defaults to half of max_tokens
+                 cache_size: int = 128   # summaries kept in memory
+                 ):
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens
+        self.cache_size = cache_size
+        self.compactions = 0
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._inflight = SingleFlight()
+
+    @abstractmethod
+    async def summarize(self, items: list, thread: 'Thread', max_tokens: int) -> str:
+        """
+        Summary text of `items`, the oldest items of `thread`'s history. Longer summaries than `max_tokens` are cut.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def cut_index(history: 'History', index: int) -> int:
+        """
+        Move a cut point back until no kept function call output is separated from its call
+        and no reasoning item from the item it preceded.
+        """
+        while True:
+            kept = {item.get("call_id") for item in history[index:] if item.get("type") == "function_call_output"}
+            calls = [i for i, item in enumerate(history[:index]) if item.get("type") == "function_call" and item.get("call_id") in kept]
+            if not calls:
+                break
+            index = min(calls)
+
+        while index > 0 and history[index - 1].get("type") == "reasoning":
+            index -= 1
+        return index
+
+    @staticmethod
+    def cache_key(history: 'History', stop: int) -> str:
+        digest = hashlib.sha256()
+        for i in range(stop):
+            digest.update(history.serialized(i).encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    @staticmethod
+    def summary_item(summary: str) -> dict:
+        return {"role": "system", "content": SUMMARY_PREFIX + summary}
+
+    @staticmethod
+    def is_summary(item: Any) -> bool:
+        return isinstance(item, dict) and item.get("role") == "system" and str(item.get("content", "")).startswith(SUMMARY_PREFIX)
+
+    def fit_summary(self, summary: str, max_tokens: int, encoding_name: str) -> Optional[dict]:
+        """
+        Summary item of at most `max_tokens` as counted by the history, None when not even a short one fits.
+        """
+        encoding = get_encoding(encoding_name)
+        tokens = encoding.encode_ordinary(summary)
+        limit = max_tokens
+        while limit > 0:
+            item = self.summary_item(encoding.decode(tokens[:limit]))
+            size = History([item]).token_count(encoding_name=encoding_name)
+            if size <= max_tokens:
+                return item
+            limit = min(limit, len(tokens)) - (size - max_tokens)   # JSON escaping and the prefix take the rest
+        return None
+
+    async def _summary(self, history: History, cut: int, thread: 'Thread', max_tokens: int) -> str:
+        key = self.cache_key(history, cut)
+        summary = self._cache.get(key)
+        if summary is not None:
+            self._cache.move_to_end(key)
+            return summary
+
+        task = self._inflight.start(key, lambda: self._load(key, history[:cut], thread, max_tokens))
+        # Shielded so one cancelled thread does not cancel the summary for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, items: list, thread: 'Thread', max_tokens: int) -> str:
+        summary = await self.summarize(items, thread, max_tokens)
+        self._cache[key] = summary
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return summary
+
+    async def compact(self, thread: 'Thread') -> bool:
+        """
+        Compact the history of `thread` when it is over the threshold. Returns True when it was compacted.
+        """
+        max_tokens = self.max_tokens or thread.max_input_tokens
+        history = thread.input
+        if not max_tokens or len(history) < 2:
+            return False
+
+        encoding_name = encoding_name_for_model(thread.agent.model)
+        await asyncio.to_thread(history.count_tokens, encoding_name)
+        if history.token_count(encoding_name=encoding_name) <= max_tokens:
+            return False
+
+        keep_tokens = self.keep_tokens or max_tokens // 2
+        cut = self.cut_index(history, min(history.start_index(keep_tokens, encoding_name), len(history) - 1))
+        if cut < 2:
+            return False   # nothing older than a previous summary to compact
+
+        # Room for the summary: what is left next to the kept items, at most max_tokens - keep_tokens
+        summary_tokens = min(max_tokens - keep_tokens, max_tokens - history.token_count(cut, encoding_name=encoding_name))
+        if summary_tokens <= 0:
+            return False   # the kept items alone fill the budget
+
+        mark = history.mark()
+        summary = await self._summary(history, cut, thread, summary_tokens)
+        item = await asyncio.to_thread(self.fit_summary, summary, summary_tokens, encoding_name)
+        if item is None or not history.appended_since(mark):
+            return False
+
+        history[:cut] = [item]
+        self.compactions += 1
+        return True
+
+
+class LocalCompactor(Compactor):
+    """
+    Deterministic summary without a model: the transcript with every line cut to `max_line_chars`.
+    """
+
+    def __init__(self, max_line_chars: int = 200, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_line_chars = max_line_chars
+
+    async def summarize(self, items: list, thread: 'Thread', max_tokens: int) -> str:
+        lines = []
+        for line in render_transcript(items).splitlines():
+            lines.append(line if len(line) <= self.max_line_chars else line[:self.max_line_chars] + "...")
+        return "\n".join(lines)
+
+
+class AgentCompactor(Compactor):
+    """
+    Summarizes with an agent, run as a separate thread on the client of the compacted thread.
+    """
+
+    def __init__(self,
+                 agent: 'Agent',   # summarizer, e.g. a small model instructed to keep facts, decisions and open tasks
+                 prompt: str = "Summarize this conversation for its continuation in at most {max_tokens} tokens. "
+                               "Keep facts, decisions, tool results and open tasks.",   # `{max_tokens}` is filled in
+                 thread_kwargs: Optional[dict] = None,   # passed to the summarizer Thread (rate_limiter, retry_policy, ...)
+                 **kwargs: Any
+                 ):
+        super().__init__(**kwargs)
+        self.agent = agent
+        self.prompt = prompt
+        self.thread_kwargs = thread_kwargs or {}
+
+    async def summarize(self, items: list, thread: 'Thread', max_tokens: int) -> str:
+        from fast_agents.thread import Thread
+
+        summarizer = Thread(
+            agent=self.agent,
+            input=[string_to_user_message(f"{self.prompt.format(max_tokens=max_tokens)}\n\n{render_transcript(items)}")],
+            client=thread.client,
+            client_provider=thread.client_provider,
+            **self.thread_kwargs,
+        )
+        output = await summarizer.run_to_completion()
+        return output.content[0].text
@@ -39,3 +39,14 @@ class ToolException(Exception):
     and its message is passed to agent.
     """
     pass
+
+
+class BatchRequestFailedException(AgentException):
+    """
+    A request submitted through the Batch API failed or has no result.
+    """
+    pass
+
+
+class CheckpointNotFoundException(AgentException):
+    pass
@@ -0,0 +1,98 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """
+    Cuts tail latency of model requests: when a request has not answered within a percentile of recent
+    latencies, a duplicate is sent (optionally to `alternate_model`), the first to finish wins and the other is cancelled.
+
+    For streamed requests the latency is the time to the first output event. Share one policy between threads
+    so it learns from all their requests; `fired` and `won` count hedges sent and hedges that beat the original.
+    Hedges are extra requests and are not counted by a RateLimiter.
+    """
+
+    def __init__(self,
+                 percentile: float = 0.95,   # hedge requests slower than this share of recent requests
+                 initial_delay: float = 2.0,   # seconds, used until `min_samples` latencies are known
+                 min_delay: float = 0.05,
+                 min_samples: int = 20,
+                 window: int = 500,   # number of recent latencies kept
+                 alternate_model: Optional[str] = None   # None = hedge with the same model
+                 ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.alternate_model = alternate_model
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.fired = 0
+        self.won = 0
+
+    @property
+    def fire_rate(self) -> float:
+        return self.fired / self.requests if self.requests else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.won / self.fired if self.fired else 0.0
+
+    def delay(self) -> float:
+        """
+        Seconds to wait for the original request before hedging it.
+        """
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        latencies = sorted(self.latencies)
+        return max(self.min_delay, latencies[int(self.percentile * (len(latencies) - 1))])
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def hedge_params(self, params: dict) -> dict:
+        return {**params, "model": self.alternate_model} if self.alternate_model else params
+
+    async def run(self, send: Callable[[dict], Awaitable[T]], params: dict, release: Optional[Callable[[T], Awaitable[None]]] = None) -> T:
+        """
+        Await `send(params)`, racing it against a hedged duplicate once it is slower than `delay()`.
+        Fails only when all requests sent fail, with the error of the original one.
+        `release` disposes of the results of losers that finished anyway (e.g. closes an opened stream).
+        The latency recorded is the time since the original request was sent, whichever request wins.
+        """
+        loop = asyncio.get_running_loop()
+        self.requests += 1
+        started = loop.time()
+
+        tasks = [asyncio.ensure_future(send(params))]
+        winner: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay())
+            if not done:
+                self.fired += 1
+                tasks.append(asyncio.ensure_future(send(self.hedge_params(params))))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.index):
+                    if task.exception() is None:
+                        winner = task
+                        self.record(loop.time() - started)
+                        if task is not tasks[0]:
+                            self.won += 1
+                        return task.result()
+
+            raise tasks[0].exception()
+        finally:
+            losers = [task for task in tasks if task is not winner]
+            for task in losers:
+                task.cancel()
+            # Let cancelled losers finish, then release every loser that produced a result anyway
+            await asyncio.gather(*losers, return_exceptions=True)
+            for task in losers:
+                if release and not task.cancelled() and task.exception() is None:
+                    await release(task.result())
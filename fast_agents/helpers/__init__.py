@@ -9,15 +9,24 @@ This subpackage contains utility functions and helpers for:
 - LLM context management
 """
 
-from fast_agents.helpers.schema_helper import format_parameters
-from fast_agents.helpers.tokenisor import num_tokens_from_string
+from fast_agents.helpers.schema_helper import format_parameters, warm_schema_cache, save_schema_cache, load_schema_cache
+from fast_agents.helpers.tokenisor import num_tokens_from_string, count_tokens_many, get_encoding, encoding_name_for_model
 from fast_agents.helpers.llm_context_helper import gather_contexts
+from fast_agents.helpers.prompt_cache_helper import PromptCacheStatsHook, derive_prompt_cache_key
 from fast_agents.helpers.function_helper import response_to_dict, string_to_user_message
 
 __all__ = [
     "format_parameters",
+    "warm_schema_cache",
+    "save_schema_cache",
+    "load_schema_cache",
     "num_tokens_from_string", 
+    "count_tokens_many",
+    "get_encoding",
+    "encoding_name_for_model",
     "gather_contexts",
     "response_to_dict",
     "string_to_user_message",
+    "PromptCacheStatsHook",
+    "derive_prompt_cache_key",
 ]
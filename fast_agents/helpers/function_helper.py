@@ -17,6 +17,16 @@ def response_to_dict(item: Any) -> dict:
         raise ValueError(f"Cannot convert item to dict: {item}")
 
 
+def json_default(value: Any) -> Any:
+    """
+    `default` for json.dumps() of input items and request bodies: pydantic models (also the openai types)
+    in JSON mode without unset optional fields, anything else as a string.
+    """
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
 def string_to_user_message(message: str) -> ResponseInputItemParam:
     return {
         "role": "user",
@@ -34,7 +34,7 @@ class HandoffRunPipeline(RunPipeline):
             return
 
         for fn_call in function_calls:
-            matching_tool = next((tool for tool in thread.agent.tools if getattr(tool, "name", None) == getattr(fn_call, "name", None)), None)
+            matching_tool = thread.agent.tool_registry.get(getattr(fn_call, "name", None))
             if matching_tool is None:
                 continue
 
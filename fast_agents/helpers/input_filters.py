@@ -1,83 +1,149 @@
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, Optional
 
 from openai.types.responses import ResponseInputParam
 from openai.types.responses.response_input_param import Message
 
 from fast_agents.helpers.function_helper import response_to_dict
 
-def filter_status(input: ResponseInputParam) -> ResponseInputParam:
-    """
-    Remove any 'status' fields from input items as the Responses API does not accept them on input.
-    """
-    filtered_input: ResponseInputParam = []
-    for item in input:
-        item_dict = response_to_dict(item)
-        item_dict.pop("status", None)
-        filtered_input.append(item_dict)
+InputFilter = Callable[[ResponseInputParam], ResponseInputParam]
+ItemFilter = Callable[[dict], Optional[dict]]   # returns None to drop the item
 
-    return filtered_input
 
-def filter_ids(input: ResponseInputParam) -> ResponseInputParam:
-    filtered_input: ResponseInputParam = []
-    for item in input:
-        item_dict = response_to_dict(item)
-        item_dict.pop("id", None)
-        filtered_input.append(item_dict)
-    return filtered_input
+def _status_item(item: dict) -> dict:
+    item.pop("status", None)
+    return item
 
-def filter_input(input: ResponseInputParam, filters: list[Callable[[ResponseInputParam], ResponseInputParam]]) -> ResponseInputParam:
-    for filter in filters:
-        input = filter(input)
-    return input
+def _ids_item(item: dict) -> dict:
+    item.pop("id", None)
+    return item
 
-def filter_files(input: ResponseInputParam) -> ResponseInputParam:
+def _files_item(item: dict) -> Optional[dict]:
+    if item.get("type") != "message":
+        return item
+
+    # Create a copy of the message without input_file content
+    filtered_content = []
+    for content in item.get("content"):
+        content = response_to_dict(content)
+        if content.get("type") != "input_file":
+            filtered_content.append(content)
+
+    # Only keep the message if it still has content after filtering
+    if not filtered_content:
+        return None
+
+    return Message(
+        id=item.get("id"),
+        role=item.get("role"),
+        content=filtered_content,
+        type=item.get("type"),
+        status=item.get("status")
+    )
+
+def _function_calls_item(item: dict) -> Optional[dict]:
+    if item.get("type") == "function_call" or item.get("type") == "function_call_output":
+        return None
+    return item
+
+def _reasoning_item(item: dict) -> Optional[dict]:
+    if item.get("type") == "reasoning":
+        return None
+    return item
+
+
+def _copy_to_dict(item) -> dict:
+    # model_dump() already returns a fresh dict; anything else is copied so filters never mutate the caller's items
+    if hasattr(item, 'model_dump'):
+        return item.model_dump()
+    return dict(response_to_dict(item))
+
+
+def _apply_item_filters(input: ResponseInputParam, item_filters: tuple[ItemFilter, ...]) -> ResponseInputParam:
     filtered_input: ResponseInputParam = []
-    
     for item in input:
-        item = response_to_dict(item)
-        if item.get("type") == "message":
-            # Create a copy of the message without input_file content
-            filtered_content = []
-            for content in item.get("content"):
-                content = response_to_dict(content)
-                if content.get("type") != "input_file":
-                    filtered_content.append(content)
-            
-            # Only add the message if it still has content after filtering
-            if filtered_content:
-                # Create a new message with filtered content
-                filtered_message = Message(
-                    id=item.get("id"),
-                    role=item.get("role"),
-                    content=filtered_content,
-                    type=item.get("type"),
-                    status=item.get("status")
-                )
-                filtered_input.append(filtered_message)
+        item = _copy_to_dict(item)
+        for item_filter in item_filters:
+            item = item_filter(item)
+            if item is None:
+                break
         else:
-            # Keep non-message items as they are
             filtered_input.append(item)
-    
     return filtered_input
-    
+
+
+def filter_status(input: ResponseInputParam) -> ResponseInputParam:
+    """
+    Remove any 'status' fields from input items as the Responses API does not accept them on input.
+    """
+    return _apply_item_filters(input, (_status_item,))
+
+def filter_ids(input: ResponseInputParam) -> ResponseInputParam:
+    return _apply_item_filters(input, (_ids_item,))
+
+def filter_files(input: ResponseInputParam) -> ResponseInputParam:
+    return _apply_item_filters(input, (_files_item,))
 
 def filter_function_calls(input: ResponseInputParam) -> ResponseInputParam:
-    filtered_input: ResponseInputParam = []
-    
-    for item in input:
-        item = response_to_dict(item)
-        if item.get("type") != "function_call" and item.get("type") != "function_call_output":
-            filtered_input.append(item)
-            
-    return filtered_input
-            
+    return _apply_item_filters(input, (_function_calls_item,))
 
 def filter_reasoning(input: ResponseInputParam) -> ResponseInputParam:
-    filtered_input: ResponseInputParam = []
-    
-    for item in input:
-        item = response_to_dict(item)
-        if item.get("type") != "reasoning":
-            filtered_input.append(item)
-            
-    return filtered_input
\ No newline at end of file
+    return _apply_item_filters(input, (_reasoning_item,))
+
+
+# Per-item counterparts of the built-in filters, used to fuse them into a single traversal
+ITEM_FILTERS: dict[InputFilter, ItemFilter] = {
+    filter_status: _status_item,
+    filter_ids: _ids_item,
+    filter_files: _files_item,
+    filter_function_calls: _function_calls_item,
+    filter_reasoning: _reasoning_item,
+}
+
+
+@lru_cache(maxsize=128)
+def compile_filters(filters: tuple[InputFilter, ...]) -> InputFilter:
+    """
+    Compile a sequence of filters into one callable.
+    Consecutive built-in filters are fused into a single pass with one dict conversion per item,
+    custom list-level filters are applied as they are, in order.
+    """
+    stages: list[InputFilter] = []
+    fused: list[ItemFilter] = []
+
+    def flush():
+        if fused:
+            item_filters = tuple(fused)
+            stages.append(lambda input: _apply_item_filters(input, item_filters))
+            fused.clear()
+
+    for filter in filters:
+        if filter in ITEM_FILTERS:
+            fused.append(ITEM_FILTERS[filter])
+        else:
+            flush()
+            stages.append(filter)
+    flush()
+
+    def pipeline(input: ResponseInputParam) -> ResponseInputParam:
+        for stage in stages:
+            input = stage(input)
+        return input
+
+    return pipeline
+
+
+def filter_input(input: ResponseInputParam, filters: list[InputFilter]) -> ResponseInputParam:
+    return compile_filters(tuple(filters))(input)
+
+
+def _is_normalized(item) -> bool:
+    return isinstance(item, dict) and "id" not in item and "status" not in item
+
+
+def normalize_input(input: ResponseInputParam) -> ResponseInputParam:
+    """
+    Convert items to the wire-format dicts the Responses API accepts on input (no 'id' / 'status').
+    Items that are already in that form are reused as they are, so normalizing a normalized history is a list copy.
+    """
+    return [item if _is_normalized(item) else _ids_item(_status_item(_copy_to_dict(item))) for item in input]
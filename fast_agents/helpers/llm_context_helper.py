@@ -1,9 +1,80 @@
 import asyncio
-from typing import TYPE_CHECKING
+import hashlib
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, Optional
+
+from fast_agents.helpers.single_flight import SingleFlight
 
 if TYPE_CHECKING:
     from fast_agents.llm_context import LlmContext
+    from pydantic import BaseModel
+
+
+def content_hash(model: 'BaseModel') -> str:
+    """
+    Hash of a pydantic model's content, usable as `LlmContext.cache_key` derived from the thread's context.
+    """
+    return hashlib.sha256(model.model_dump_json().encode()).hexdigest()
+
+
+class LlmContextCache:
+    """
+    In-memory LRU cache of `LlmContext.dumps()` results for contexts that define a `ttl`.
+
+    Concurrent refreshes of the same key share one `dumps()` call. Contexts with
+    `stale_while_revalidate` return expired content immediately and refresh it in the background.
+    """
+
+    def __init__(self, maxsize: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, str]] = OrderedDict()   # key -> (expires at, content)
+        self._inflight = SingleFlight()
+        self._generation = 0   # increased by clear(), refreshes started before are not stored
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+        self._generation += 1
+
+    async def get(self, llm_context: 'LlmContext', context: Optional['BaseModel'] = None) -> str:
+        if llm_context.ttl is None:
+            return await llm_context.dumps()
+
+        key = (type(llm_context), llm_context.cache_key(context))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            expires_at, content = entry
+            if self.clock() < expires_at:
+                return content
+            if llm_context.stale_while_revalidate:
+                self._refresh(key, llm_context)
+                return content
+
+        # Shielded so one cancelled waiter does not cancel the refresh for everyone else
+        return await asyncio.shield(self._refresh(key, llm_context))
+
+    def _refresh(self, key: Hashable, llm_context: 'LlmContext') -> asyncio.Task:
+        generation = self._generation
+        return self._inflight.start(key, lambda: self._load(key, llm_context, generation))
+
+    async def _load(self, key: Hashable, llm_context: 'LlmContext', generation: int) -> str:
+        content = await llm_context.dumps()
+        if generation != self._generation:
+            return content
+        self._entries[key] = (self.clock() + llm_context.ttl, content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return content
+
+
+llm_context_cache = LlmContextCache()
+
 
-async def gather_contexts(contexts: list['LlmContext']) -> str:
-    results = await asyncio.gather(*(context.dumps() for context in contexts))
-    return '\n\n'.join(results)
\ No newline at end of file
+async def gather_contexts(contexts: list['LlmContext'], context: Optional['BaseModel'] = None, cache: Optional[LlmContextCache] = None) -> str:
+    cache = cache or llm_context_cache
+    results = await asyncio.gather(*(cache.get(llm_context, context) for llm_context in contexts))
+    return '\n\n'.join(results)
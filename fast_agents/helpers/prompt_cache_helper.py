@@ -0,0 +1,53 @@
+import hashlib
+import json
+from typing import TYPE_CHECKING, Iterable
+
+from pydantic import Field
+
+from fast_agents.hook import Hook
+
+if TYPE_CHECKING:
+    from fast_agents.run_context import RunContext
+    from openai.types.responses import Response
+
+
+def tools_digest(tool_definitions: Iterable[dict]) -> str:
+    """
+    Stable hash of tool definitions (key order independent).
+    """
+    serialized = json.dumps(list(tool_definitions), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def derive_prompt_cache_key(instructions: str, tool_definitions_digest: str) -> str:
+    """
+    Default prompt_cache_key: requests sharing instructions and tools share the key and therefore the cached prefix.
+    """
+    digest = hashlib.sha256(f"{instructions}\0{tool_definitions_digest}".encode()).hexdigest()
+    return f"fa-{digest[:32]}"
+
+
+class PromptCacheStatsHook(Hook):
+    """
+    Records input and cached tokens of every turn to verify prompt cache hit rates.
+    """
+    turns: list[dict] = Field(default_factory=list)
+
+    async def on_end(self, run_context: 'RunContext', output: 'Response'):
+        usage = getattr(output, "usage", None)
+        if usage is None:
+            return
+
+        details = getattr(usage, "input_tokens_details", None)
+        self.turns.append({
+            "turn": run_context.turn,
+            "input_tokens": usage.input_tokens,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        })
+
+    @property
+    def hit_rate(self) -> float:
+        input_tokens = sum(turn["input_tokens"] for turn in self.turns)
+        if not input_tokens:
+            return 0.0
+        return sum(turn["cached_tokens"] for turn in self.turns) / input_tokens
@@ -1,9 +1,54 @@
-from typing import TYPE_CHECKING, Type
+import hashlib
+import json
+import re
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING, Type, Iterable
+
+import pydantic
 
 if TYPE_CHECKING:
     from pydantic import BaseModel
 
 
+class FrozenDict(dict):
+    """
+    Read-only dict the schema cache stores. Nested lists are stored as tuples.
+    Use `copy.deepcopy()` to get a mutable copy.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached schemas are read-only, use copy.deepcopy() to get a mutable copy")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
 def remove_titles(d):
     if isinstance(d, dict):
         d.pop('title', None)
@@ -14,13 +59,93 @@ def remove_titles(d):
             remove_titles(item)
 
 
-def format_parameters(s: 'Type[BaseModel]'):
+# Weak keys so dynamically created models can still be garbage collected
+_schema_cache: 'weakref.WeakKeyDictionary[type, FrozenDict]' = weakref.WeakKeyDictionary()
+# Schemas loaded from disk, keyed by qualified model name, consumed on first use
+_persisted_schemas: dict[str, dict] = {}
+# Class ids in refs and function addresses differ between processes
+_PROCESS_SPECIFIC = re.compile(r":\d+(?=')| at 0x[0-9a-f]+")
+
+
+def _qualified_name(s: 'Type[BaseModel]') -> str:
+    return f"{s.__module__}.{s.__qualname__}"
+
+
+def schema_fingerprint(s: 'Type[BaseModel]') -> str:
+    """
+    Hash of a model's definition (fields, types, defaults, nested models), stable across processes.
+    Derived from the pydantic core schema, which is much cheaper than generating the JSON schema.
+    """
+    return hashlib.sha256(_PROCESS_SPECIFIC.sub("", repr(s.__pydantic_core_schema__)).encode()).hexdigest()
+
+
+def _build_parameters(s: 'Type[BaseModel]') -> dict:
     schema = s.model_json_schema()
     remove_titles(schema)
-    
+
     # Add additionalProperties: false to prevent extra properties
     if isinstance(schema, dict):
         schema['additionalProperties'] = False
-    
+
     return schema
 
+
+def _cached_parameters(s: 'Type[BaseModel]') -> FrozenDict:
+    schema = _schema_cache.get(s)
+    if schema is None:
+        persisted = _persisted_schemas.pop(_qualified_name(s), None)
+        if persisted is not None and persisted.get("fingerprint") == schema_fingerprint(s):
+            schema = freeze(persisted["schema"])
+        else:
+            schema = freeze(_build_parameters(s))
+        _schema_cache[s] = schema
+    return schema
+
+
+def format_parameters(s: 'Type[BaseModel]') -> dict:
+    """
+    JSON schema of a model as sent to the API. Computed once per model class; every call returns a mutable copy.
+    """
+    return thaw(_cached_parameters(s))
+
+
+def warm_schema_cache(models: Iterable['Type[BaseModel]']) -> None:
+    for model in models:
+        _cached_parameters(model)
+
+
+def clear_schema_cache() -> None:
+    _schema_cache.clear()
+    _persisted_schemas.clear()
+
+
+def save_schema_cache(path: str | Path) -> int:
+    """
+    Persist cached schemas of importable (module level) models to a JSON file.
+    Returns the number of schemas written.
+    """
+    schemas = {
+        _qualified_name(model): {"fingerprint": schema_fingerprint(model), "schema": thaw(schema)}
+        for model, schema in list(_schema_cache.items())
+        if "<locals>" not in model.__qualname__
+    }
+    Path(path).write_text(json.dumps({"pydantic": pydantic.VERSION, "schemas": schemas}))
+    return len(schemas)
+
+
+def load_schema_cache(path: str | Path) -> int:
+    """
+    Load schemas saved by `save_schema_cache` so worker processes skip schema generation on warm start.
+    Files written by a different pydantic version are ignored, and so are schemas of models whose definition
+    changed since (see `schema_fingerprint`). Returns the number of schemas loaded.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+
+    data = json.loads(path.read_text())
+    if data.get("pydantic") != pydantic.VERSION:
+        return 0
+
+    _persisted_schemas.update(data.get("schemas", {}))
+    return len(data.get("schemas", {}))
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Tasks of in-flight loads by key, so concurrent loads of the same key share one task.
+
+    Tasks are kept per event loop and removed once done. Await them through `asyncio.shield`, so one cancelled
+    waiter does not cancel the load for everyone else. Errors are marked as retrieved, so loads nobody awaits
+    (e.g. background refreshes) do not log warnings; awaiting callers still get them raised.
+    """
+
+    def __init__(self):
+        self._tasks: dict[tuple, asyncio.Task] = {}   # (loop, key) -> task
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def start(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Task loading `key`, started with `load()` unless a load of the key is already running.
+        """
+        task_key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = self._tasks[task_key] = asyncio.create_task(load())
+            task.add_done_callback(lambda t: self._done(task_key, t))
+        return task
+
+    def clear(self) -> None:
+        """
+        Forget running loads, later calls of `start` start new ones. Running loads are not cancelled.
+        """
+        self._tasks.clear()
+
+    def _done(self, task_key: tuple, task: asyncio.Task) -> None:
+        if self._tasks.get(task_key) is task:
+            del self._tasks[task_key]
+        if not task.cancelled():
+            task.exception()
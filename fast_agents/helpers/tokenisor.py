@@ -1,6 +1,54 @@
+import threading
+from typing import Iterable, Optional
+
 import tiktoken
 
-def num_tokens_from_string(string: str, encoding_name: str = "o200k_base") -> int:
-    encoding = tiktoken.get_encoding(encoding_name)
-    num_tokens = len(encoding.encode(string))
-    return num_tokens
+DEFAULT_ENCODING = "o200k_base"
+
+_encodings: dict[str, tiktoken.Encoding] = {}
+_encodings_lock = threading.Lock()
+
+
+def get_encoding(encoding_name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """
+    Return a shared tiktoken encoding, loading it on first use.
+    """
+    encoding = _encodings.get(encoding_name)
+    if encoding is None:
+        with _encodings_lock:
+            encoding = _encodings.get(encoding_name)
+            if encoding is None:
+                encoding = tiktoken.get_encoding(encoding_name)
+                _encodings[encoding_name] = encoding
+    return encoding
+
+
+def encoding_name_for_model(model: Optional[str]) -> str:
+    """
+    Map a model name (e.g. `gpt-4o`, `gpt-5.1`) to its encoding name.
+    Unknown or missing models fall back to `o200k_base`, used by all current OpenAI models.
+    """
+    if not model:
+        return DEFAULT_ENCODING
+    try:
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        return DEFAULT_ENCODING
+
+
+def num_tokens_from_string(string: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    return len(get_encoding(encoding_name).encode_ordinary(string))
+
+
+def count_tokens_many(strings: Iterable[str], encoding_name: str = DEFAULT_ENCODING, num_threads: int = 8) -> list[int]:
+    """
+    Count tokens of many strings at once using tiktoken's threaded batch encoder.
+    """
+    strings = list(strings)
+    if not strings:
+        return []
+    if len(strings) == 1:
+        return [num_tokens_from_string(strings[0], encoding_name)]
+
+    encoded = get_encoding(encoding_name).encode_ordinary_batch(strings, num_threads=num_threads)
+    return [len(tokens) for tokens in encoded]
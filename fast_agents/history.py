@@ -0,0 +1,412 @@
+import json
+import mmap
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableSequence
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from fast_agents.helpers.function_helper import json_default
+from fast_agents.helpers.input_filters import normalize_input
+from fast_agents.helpers.tokenisor import count_tokens_many, DEFAULT_ENCODING
+
+
+class _Segment:
+    """
+    Consecutive items with their caches. Full segments are never changed in place (apart from spilling),
+    which lets forked histories share them.
+    """
+    __slots__ = ("items", "serialized", "spans", "spill", "encoding", "prefix")
+
+    def __init__(self, items: list):
+        self.items: Optional[list] = items   # None once spilled
+        self.serialized: list[Optional[str]] = [None] * len(items)
+        self.spans: Optional[list[tuple[int, int]]] = None   # (offset, length) of each item in `spill`
+        self.spill: Optional['_SpillFile'] = None
+        self.encoding: Optional[str] = None
+        self.prefix: list[int] = [0]   # prefix[i] == tokens of the first i items in `encoding`
+
+    def __len__(self) -> int:
+        return len(self.items) if self.items is not None else len(self.spans)
+
+    def copy(self) -> '_Segment':
+        segment = _Segment(list(self.items))
+        segment.serialized = list(self.serialized)
+        segment.encoding, segment.prefix = self.encoding, list(self.prefix)
+        return segment
+
+
+class _SpillFile:
+    """
+    Append-only temporary file of serialized items, read through a memory map.
+    """
+
+    def __init__(self, directory: Optional[str | Path] = None):
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.size = 0
+        self.map: Optional[mmap.mmap] = None
+        self.users = 1   # histories sharing the file through fork()
+
+    def write(self, data: bytes) -> int:
+        offset = self.size
+        self.file.seek(offset)
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self.map is None or len(self.map) < offset + length:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+        return self.map[offset:offset + length]
+
+    def close(self) -> None:
+        self.users -= 1
+        if self.users > 0:
+            return
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+class History(MutableSequence):
+    """
+    Input items of a thread, stored in normalized wire format in fixed size segments.
+
+    Appending only touches the last segment and keeps every cache valid. Inserting, replacing or deleting
+    items rebuilds the segments from the changed one on and increases `generation`, so callers can tell
+    a grown history from a rewritten one without comparing items.
+
+    The JSON form and token count of each item are computed once and cached. With `spill_after_segments`,
+    full segments older than the newest ones are written to a memory mapped temporary file and dropped from
+    memory; their items are decoded again whenever they are read, so spilling suits histories whose old
+    items are rarely sent (e.g. with max_input_tokens).
+
+    `fork()` returns a copy that shares all full segments with the original, so forking costs only
+    the partially filled last segment.
+
+    History is not a `list`: use `to_list()` for json.dumps() or isinstance checks. `copy()` and `+`
+    return plain lists like they do for lists. To spill a thread's history, pass it a History created
+    with `spill_after_segments`; lists assigned to `Thread.input` later keep its settings.
+    """
+
+    def __init__(self,
+                 items: Iterable[Any] = (),
+                 segment_size: int = 512,   # items per segment
+                 spill_after_segments: Optional[int] = None,   # full segments kept in memory, None = never spill
+                 spill_dir: Optional[str | Path] = None   # directory of the spill file, defaults to the system temp dir
+                 ):
+        self.segment_size = segment_size
+        self.spill_after_segments = spill_after_segments
+        self.spill_dir = spill_dir
+        self.generation = 0   # increased by every mutation other than appending
+        self._segments: list[_Segment] = [_Segment([])]
+        self._starts: list[int] = [0]   # index of the first item of each segment
+        self._length = 0
+        self._spill: Optional[_SpillFile] = None
+        self._in_memory = 0   # index of the oldest segment not spilled
+        self._lock = threading.RLock()   # token counting may run in a worker thread
+        self.extend(items)
+
+    # Sequence protocol
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _locate(self, index: int) -> tuple[_Segment, int]:
+        position = bisect_right(self._starts, index) - 1
+        return self._segments[position], index - self._starts[position]
+
+    def _item(self, segment: _Segment, offset: int) -> Any:
+        if segment.items is not None:
+            return segment.items[offset]
+        return json.loads(segment.spill.read(*segment.spans[offset]))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return list(self._iter_range(start, stop))
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("History index out of range")
+        return self._item(*self._locate(index))
+
+    def _iter_range(self, start: int, stop: int) -> Iterator[Any]:
+        if start >= stop:
+            return
+        position = bisect_right(self._starts, start) - 1
+        while position < len(self._segments) and self._starts[position] < stop:
+            segment, first = self._segments[position], self._starts[position]
+            begin, end = max(start - first, 0), min(stop - first, len(segment))
+            if segment.items is not None:
+                yield from segment.items[begin:end]
+            else:
+                for offset in range(begin, end):
+                    yield self._item(segment, offset)
+            position += 1
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._iter_range(0, self._length)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (History, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"History({self._length} items, {len(self._segments)} segments)"
+
+    # List compatibility
+
+    def to_list(self) -> list:
+        return list(self)
+
+    def copy(self) -> list:
+        return self.to_list()
+
+    def __add__(self, other):
+        if isinstance(other, (History, list, tuple)):
+            return self.to_list() + list(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, (list, tuple)):
+            return list(other) + self.to_list()
+        return NotImplemented
+
+    def settings(self) -> dict:
+        """
+        Constructor arguments other than the items, to create a History stored the same way.
+        """
+        return {"segment_size": self.segment_size, "spill_after_segments": self.spill_after_segments, "spill_dir": self.spill_dir}
+
+    def mark(self) -> tuple['History', int, int]:
+        """
+        Current state, to check later with `appended_since` whether items were only appended in between.
+        """
+        return self, self.generation, self._length
+
+    def appended_since(self, mark: Optional[tuple['History', int, int]]) -> bool:
+        return mark is not None and mark[0] is self and mark[1] == self.generation and self._length >= mark[2]
+
+    def fork(self) -> 'History':
+        """
+        Independent copy sharing the full segments (and their caches) with this history.
+        """
+        child = History(**self.settings())
+        child._lock = self._lock   # shared segments are counted and spilled under one lock
+        with self._lock:
+            child._segments = [*self._segments[:-1], self._segments[-1].copy()]
+            child._starts = list(self._starts)
+            child._length = self._length
+            if self._spill is None and self.spill_after_segments is not None:
+                self._spill = _SpillFile(self.spill_dir)   # one file for all forks, which spill each other's shared segments
+            child._spill = self._spill
+            if child._spill is not None:
+                child._spill.users += 1
+            child._in_memory = self._in_memory
+        return child
+
+    # Appending (fast path)
+
+    def append(self, item: Any) -> None:
+        self.extend([item])
+
+    def extend(self, items: Iterable[Any]) -> None:
+        if items is self:
+            items = list(items)
+        normalized = normalize_input(list(items))
+        # count_tokens() may read the open segment from a worker thread
+        with self._lock:
+            for item in normalized:
+                segment = self._segments[-1]
+                if len(segment) >= self.segment_size:
+                    self._seal()
+                    segment = self._segments[-1]
+                segment.items.append(item)
+                segment.serialized.append(None)
+                self._length += 1
+
+    def _seal(self) -> None:
+        self._starts.append(self._length)
+        self._segments.append(_Segment([]))
+        if self.spill_after_segments is not None:
+            # Full segments are all but the last one
+            while len(self._segments) - 1 - self._in_memory > self.spill_after_segments:
+                self._spill_segment(self._segments[self._in_memory])
+                self._in_memory += 1
+
+    def _spill_segment(self, segment: _Segment) -> None:
+        with self._lock:
+            if segment.items is None:
+                return   # already spilled by a history sharing the segment
+            if self._spill is None:
+                self._spill = _SpillFile(self.spill_dir)
+            encoded = [self._serialize(segment, offset).encode() for offset in range(len(segment))]
+            offset = self._spill.write(b"".join(encoded))
+
+            spans = []
+            for data in encoded:
+                spans.append((offset, len(data)))
+                offset += len(data)
+            segment.spans = spans
+            segment.spill = self._spill
+            segment.items = None
+            segment.serialized = []
+
+    # Other mutations (rebuild)
+
+    def _rewrite(self, start: int, edit) -> None:
+        """
+        Apply `edit` to the list of items from the segment containing `start` on and rebuild those segments.
+        """
+        position = max(bisect_right(self._starts, min(start, max(self._length - 1, 0))) - 1, 0)
+        first = self._starts[position]
+        tail = list(self._iter_range(first, self._length))
+        edit(tail, first)
+
+        with self._lock:
+            del self._segments[position:]
+            del self._starts[position:]
+            self._in_memory = min(self._in_memory, position)
+            self._length = first
+            self.generation += 1
+
+            self._segments.append(_Segment([]))
+            self._starts.append(first)
+            self.extend(tail)
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                items = list(self)
+                items[index] = value
+                self._rewrite(0, lambda tail, first: tail.__setitem__(slice(None), items))
+                return
+            value = list(value)
+            self._rewrite(start, lambda tail, first: tail.__setitem__(slice(start - first, stop - first), value))
+            return
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("History assignment index out of range")
+        self._rewrite(index, lambda tail, first: tail.__setitem__(index - first, value))
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                items = list(self)
+                del items[index]
+                self._rewrite(0, lambda tail, first: tail.__setitem__(slice(None), items))
+                return
+            self._rewrite(start, lambda tail, first: tail.__delitem__(slice(start - first, stop - first)))
+            return
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("History assignment index out of range")
+        self._rewrite(index, lambda tail, first: tail.__delitem__(index - first))
+
+    def insert(self, index: int, value: Any) -> None:
+        if index < 0:
+            index = max(index + self._length, 0)
+        if index >= self._length:
+            self.append(value)
+            return
+        self._rewrite(index, lambda tail, first: tail.insert(index - first, value))
+
+    def clear(self) -> None:
+        self._rewrite(0, lambda tail, first: tail.clear())
+
+    # Caches
+
+    def _serialize(self, segment: _Segment, offset: int) -> str:
+        if segment.items is None:
+            return segment.spill.read(*segment.spans[offset]).decode()
+        serialized = segment.serialized[offset]
+        if serialized is None:
+            serialized = segment.serialized[offset] = json.dumps(segment.items[offset], default=json_default)
+        return serialized
+
+    def serialized(self, index: int) -> str:
+        """
+        Cached JSON form of an item.
+        """
+        if index < 0:
+            index += self._length
+        return self._serialize(*self._locate(index))
+
+    def count_tokens(self, encoding_name: str = DEFAULT_ENCODING) -> None:
+        """
+        Tokenize items not counted yet. Counts are kept with their segment until it is rewritten or another encoding is used.
+        The lock is held only to collect texts and store counts, not while tokenizing, so appending never waits for it.
+        """
+        with self._lock:
+            pending: list[tuple[_Segment, int, list[str]]] = []
+            for segment in self._segments:
+                if segment.encoding != encoding_name:
+                    segment.encoding, segment.prefix = encoding_name, [0]
+                counted = len(segment.prefix) - 1
+                if counted < len(segment):
+                    pending.append((segment, counted, [self._serialize(segment, offset) for offset in range(counted, len(segment))]))
+        if not pending:
+            return
+
+        counts = iter(count_tokens_many([text for _, _, texts in pending for text in texts], encoding_name))
+        with self._lock:
+            for segment, counted, texts in pending:
+                segment_counts = [next(counts) for _ in texts]
+                if segment.encoding != encoding_name or len(segment.prefix) - 1 != counted:
+                    continue   # counted concurrently, or recounted in another encoding
+                total = segment.prefix[-1]
+                for count in segment_counts:
+                    total += count
+                    segment.prefix.append(total)
+
+    def _tokens_before(self, index: int) -> int:
+        if index >= self._length:
+            return sum(segment.prefix[-1] for segment in self._segments)
+        position = bisect_right(self._starts, index) - 1
+        return sum(segment.prefix[-1] for segment in self._segments[:position]) + self._segments[position].prefix[index - self._starts[position]]
+
+    def token_count(self, start: int = 0, stop: Optional[int] = None, encoding_name: str = DEFAULT_ENCODING) -> int:
+        """
+        Tokens of items[start:stop].
+        """
+        self.count_tokens(encoding_name)
+        stop = self._length if stop is None else stop
+        return self._tokens_before(stop) - self._tokens_before(start)
+
+    def start_index(self, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> int:
+        """
+        Index of the oldest item of the longest suffix whose token count fits into `max_tokens`.
+        """
+        self.count_tokens(encoding_name)
+        remaining = max_tokens
+        for position in range(len(self._segments) - 1, -1, -1):
+            prefix = self._segments[position].prefix
+            if prefix[-1] > remaining:
+                # Smallest offset i such that prefix[-1] - prefix[i] <= remaining
+                return self._starts[position] + bisect_left(prefix, prefix[-1] - remaining)
+            remaining -= prefix[-1]
+        return 0
+
+    def close(self) -> None:
+        """
+        Release the spill file. Forks share it, it is closed once every history using it is closed;
+        spilled items can no longer be read from this history afterwards.
+        """
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
@@ -1,17 +1,34 @@
+import weakref
 from abc import abstractmethod, ABC
-from typing import ClassVar, Optional
+from typing import TYPE_CHECKING, ClassVar, Hashable, Optional
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
 
 
 class LlmContext(ABC):
     # Static metadata configured on subclasses; defaulted via __init_subclass__
     name: ClassVar[Optional[str]] = None
 
+    # Seconds content is cached for (see LlmContextCache), None = fetched on every turn
+    ttl: ClassVar[Optional[float]] = None
+    # Serve expired content while it is refreshed in the background
+    stale_while_revalidate: ClassVar[bool] = False
+
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         # Default name to class name if not provided or falsy
         if not getattr(cls, "name", None):
             cls.name = cls.__name__
 
+    def cache_key(self, context: Optional['BaseModel']) -> Hashable:
+        """
+        Key content is cached under (together with the class). Defaults to a weak reference to this instance,
+        so the cache does not keep contexts alive. Override to share content across instances and threads,
+        e.g. `return context.user_id` or `return content_hash(context)`.
+        """
+        return weakref.ref(self)
+
     @abstractmethod
     async def get_content(self) -> str:
         raise NotImplementedError
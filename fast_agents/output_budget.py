@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import math
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import ClassVar, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from fast_agents.exceptions import ToolException
+from fast_agents.helpers.tokenisor import DEFAULT_ENCODING, encoding_name_for_model, get_encoding
+from fast_agents.tool import Tool
+from fast_agents.tool_response import ToolResponse
+
+READ_TOOL_NAME = "read_tool_output"
+
+
+class BlobStore(ABC):
+    """
+    Storage of tool outputs too large to send whole, addressed by the reference `put` returns.
+    """
+    persistent: bool = True   # references stay readable by other processes, e.g. after Thread.resume()
+
+    @abstractmethod
+    def put(self, text: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, ref: str) -> Optional[str]:
+        """
+        Stored text, None for unknown references (they come from the model).
+        """
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """
+    One file per blob in `directory`, named by the hash of its content. Defaults to a temporary directory
+    removed together with the store; references into it are lost with the process, so threads with a
+    checkpointer need a `directory` to read spilled outputs after a resume.
+    """
+
+    def __init__(self, directory: Optional[str | Path] = None):
+        self.persistent = directory is not None
+        self._temporary = tempfile.TemporaryDirectory(prefix="fast-agents-blobs-") if directory is None else None
+        self.directory = Path(directory) if directory is not None else Path(self._temporary.name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def put(self, text: str) -> str:
+        ref = hashlib.sha256(text.encode()).hexdigest()[:24]
+        path = self.directory / ref
+        if not path.exists():
+            path.write_text(text)
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        if not re.fullmatch(r"[0-9a-f]{24}", ref):
+            return None
+        path = self.directory / ref
+        return path.read_text() if path.exists() else None
+
+
+class ReadToolOutputSchema(BaseModel):
+    ref: str = Field(..., description="Reference of the stored tool output.")
+    page: int = Field(..., description="Page to read, starting at 1.")
+
+
+class ReadToolOutputTool(Tool):
+    """
+    Read a page of a tool output that was too large to return whole.
+    """
+    name = READ_TOOL_NAME
+    schema = ReadToolOutputSchema
+
+    # Set on the per-budget subclass created by OutputBudget
+    budget: ClassVar[Optional['OutputBudget']] = None
+
+    async def handle(self, ref: str, page: int, **kwargs) -> str:
+        encoding_name = encoding_name_for_model(self.run_context.agent.model) if self.run_context else DEFAULT_ENCODING
+        text = await asyncio.to_thread(self.budget.page, ref, page, encoding_name)
+        if text is None:
+            raise ToolException(f"No page {page} of stored output {ref}")
+        return text
+
+
+class OutputBudget:
+    """
+    Limits the tokens a tool output adds to the thread input, and so to every later request of the thread.
+
+    The limit of a tool is its `tool_limits` entry, else the `max_output_tokens` ClassVar of the tool, else `max_tokens`.
+    Outputs over the limit are shortened according to `strategy`:
+    - "truncate": the first tokens of the output,
+    - "elide": the first and last tokens, with the number of tokens left out in between,
+    - "spill": the first tokens, while the whole output is put into `blob_store` and the agent gets
+      the `read_tool_output` tool to read it page by page.
+    The shortened text replaces `ToolResponse.output_str`; `output` keeps the full value.
+    """
+
+    def __init__(self,
+                 max_tokens: Optional[int] = None,   # default limit of all tools, None = only tools with max_output_tokens are limited
+                 strategy: Literal["truncate", "elide", "spill"] = "truncate",
+                 tool_limits: Optional[dict[str, int]] = None,   # tool name -> max output tokens
+                 blob_store: Optional[BlobStore] = None,   # "spill": defaults to a LocalBlobStore in a temporary directory, not usable with a checkpointer
+                 page_tokens: int = 2000   # "spill": tokens per page returned by read_tool_output
+                 ):
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.tool_limits = tool_limits or {}
+        self.page_tokens = page_tokens
+        self.blob_store = blob_store or (LocalBlobStore() if strategy == "spill" else None)
+        # Tools are instantiated per call, so the tool reaches this budget through its class
+        self.read_tool: Optional[Tool] = type("ReadToolOutputTool", (ReadToolOutputTool,), {"budget": self})() if strategy == "spill" else None
+
+    def limit_for(self, tool: Optional[Tool]) -> Optional[int]:
+        if tool is None or isinstance(tool, ReadToolOutputTool):
+            return None   # pages are bounded already
+        if tool.name in self.tool_limits:
+            return self.tool_limits[tool.name]
+        return tool.max_output_tokens if tool.max_output_tokens is not None else self.max_tokens
+
+    def fit(self, text: str, limit: int, encoding_name: str = DEFAULT_ENCODING) -> Optional[str]:
+        """
+        `text` shortened to about `limit` tokens, None when it fits.
+        """
+        if len(text.encode()) <= limit:
+            return None   # a token covers at least one byte
+        encoding = get_encoding(encoding_name)
+        tokens = encoding.encode_ordinary(text)
+        if len(tokens) <= limit:
+            return None
+
+        if self.strategy == "elide":
+            head = limit // 2
+            return (f"{encoding.decode(tokens[:head])}\n[... {len(tokens) - limit} of {len(tokens)} tokens elided ...]\n"
+                    f"{encoding.decode(tokens[len(tokens) - limit + head:])}")
+
+        if self.strategy == "spill":
+            ref = self.blob_store.put(text)
+            pages = math.ceil(len(tokens) / self.page_tokens)
+            return (f"{encoding.decode(tokens[:limit])}\n[... output of {len(tokens)} tokens truncated. "
+                    f"Call {READ_TOOL_NAME} with ref \"{ref}\" and page 1 to {pages} to read all of it.]")
+
+        return f"{encoding.decode(tokens[:limit])}\n[... truncated {len(tokens) - limit} of {len(tokens)} tokens]"
+
+    def page(self, ref: str, page: int, encoding_name: str = DEFAULT_ENCODING) -> Optional[str]:
+        text = self.blob_store.get(ref) if self.blob_store else None
+        if text is None:
+            return None
+        encoding = get_encoding(encoding_name)
+        tokens = encoding.encode_ordinary(text)
+        pages = max(1, math.ceil(len(tokens) / self.page_tokens))
+        if not 1 <= page <= pages:
+            return None
+        return f"[page {page} of {pages}]\n{encoding.decode(tokens[(page - 1) * self.page_tokens:page * self.page_tokens])}"
+
+    async def apply(self, tool: Optional[Tool], response: ToolResponse, encoding_name: str = DEFAULT_ENCODING) -> ToolResponse:
+        """
+        `response` with its output text shortened to the limit of `tool`. Tokenizing runs in a worker thread.
+        """
+        limit = self.limit_for(tool)
+        if limit is None:
+            return response
+        text = response.output_str
+        if len(text.encode()) <= limit:
+            return response
+
+        budgeted = await asyncio.to_thread(self.fit, text, limit, encoding_name)
+        return response if budgeted is None else response.model_copy(update={"budgeted_output": budgeted})
+
+
+default_output_budget = OutputBudget()
@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Bucket holding up to `per_minute` units, refilled continuously at `per_minute / 60` units per second.
+    The level may go negative when actual usage turns out higher than reserved.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.clock = clock
+        self.level = float(per_minute)
+        self.updated = clock()
+
+    def refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """
+        Seconds until `amount` units are available.
+        """
+        self.refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.refill()
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Shared scheduler for model requests with requests/minute and tokens/minute buckets.
+
+    Requests wait in a queue ordered by priority (lower values are served first) and arrival,
+    so a large request is not starved by smaller ones behind it. Token costs are estimated before
+    sending and corrected with `reconcile` once the response usage is known.
+    """
+
+    def __init__(self,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic
+                 ):
+        self.requests = TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self._waiters: list[tuple[int, int, asyncio.Future, int]] = []   # (priority, arrival, future, tokens)
+        self._arrival = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _delay_for(self, tokens: int) -> float:
+        delays = [0.0]
+        if self.requests:
+            delays.append(self.requests.delay_for(1))
+        if self.tokens:
+            delays.append(self.tokens.delay_for(tokens))
+        return max(delays)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self._waiters:
+            priority, arrival, future, tokens = self._waiters[0]
+            if future.done():   # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+
+            delay = self._delay_for(tokens)
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+            future.set_result(tokens)
+
+    def _wake(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+        self._dispatch()
+
+    async def acquire(self, tokens: int = 0, priority: int = 0) -> int:
+        """
+        Wait until a request estimated at `tokens` may be sent. Returns the reserved token count for `reconcile`.
+        """
+        if self.tokens:
+            tokens = min(tokens, int(self.tokens.capacity))   # larger requests could never be admitted
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrival), future, tokens))
+        self._wake()
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._wake()   # let requests queued behind this one proceed
+            else:
+                self.reconcile(tokens, 0)   # admitted but never sent
+            raise
+
+    def reconcile(self, reserved: int, used: int) -> None:
+        """
+        Correct the tokens bucket with the actual usage of a request.
+        """
+        if not self.tokens or used == reserved:
+            return
+        if used > reserved:
+            self.tokens.take(used - reserved)
+        else:
+            self.tokens.give(reserved - used)
+        if self._waiters:
+            self._wake()
@@ -0,0 +1,92 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import openai
+from pydantic import BaseModel, Field
+
+from fast_agents.exceptions import StreamingFailedException
+
+
+class StreamRetryEvent(BaseModel):
+    """
+    Yielded by `Thread.stream()` before a failed stream is retried. Events of the failed attempt were already
+    yielded and the retry starts over, so discard deltas accumulated since the turn started.
+    """
+    type: str = "stream.retry"
+    error: str = Field(..., description="Error of the failed attempt.")
+    failed_model: str = Field(..., description="Model of the failed attempt.")
+    model: str = Field(..., description="Model of the retry, differs from `failed_model` after a fallback.")
+    delay: float = Field(..., description="Seconds until the retry is sent.")
+
+
+class RetryPolicy:
+    """
+    Retries failed model requests of a Thread with exponential backoff and full jitter.
+
+    Only the request is retried, with the same parameters, so tools already executed are never run again.
+    A `Retry-After` header sent with the error takes precedence over the computed backoff.
+    When the model is overloaded, the request switches to the next of `Agent.fallback_models` right away.
+    This policy sits on top of the client's own `max_retries`.
+    """
+
+    def __init__(self,
+                 max_attempts: int = 3,   # attempts per model, including the first one
+                 initial_delay: float = 0.5,   # seconds, upper bound of the first backoff
+                 max_delay: float = 30.0,   # cap of the computed backoff
+                 multiplier: float = 2.0,
+                 jitter: bool = True,   # full jitter: a random delay between 0 and the backoff
+                 retry_statuses: tuple[int, ...] = (408, 409, 429, 500, 502, 503, 504, 529),
+                 overload_statuses: tuple[int, ...] = (500, 502, 503, 529)   # statuses that trigger a model fallback
+                 ):
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
+        self.overload_statuses = overload_statuses
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, (openai.APIConnectionError, StreamingFailedException)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in self.retry_statuses
+        return False
+
+    def is_overloaded(self, error: BaseException) -> bool:
+        return isinstance(error, openai.APIStatusError) and error.status_code in self.overload_statuses
+
+    @staticmethod
+    def retry_after(error: BaseException) -> Optional[float]:
+        """
+        Seconds requested by the server through `retry-after-ms` or `retry-after` headers.
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+
+        try:
+            if (value := headers.get("retry-after-ms")) is not None:
+                return max(0.0, float(value) / 1000)
+            if (value := headers.get("retry-after")) is None:
+                return None
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retry number `attempt` (starting at 1).
+        """
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def delay_for(self, error: BaseException, attempt: int) -> float:
+        retry_after = self.retry_after(error)
+        return retry_after if retry_after is not None else self.backoff(attempt)
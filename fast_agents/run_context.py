@@ -13,7 +13,7 @@ class RunContext(BaseModel):
     agent: Agent = Field(..., description="The agent that is running the thread.")
     turn: int = Field(..., description="The turn number of the thread.")
     max_turns: int = Field(..., description="The maximum number of turns the thread can take.")
-    input: ResponseInputParam | list[Any] = Field(..., description="The input of the thread.")
+    input: ResponseInputParam | list[Any] = Field(..., description="The input sent to the model in this turn, followed by the items added since. Changing it does not change the thread's history.")
     context: Optional['BaseModel'] = Field(None, description="The context of the thread.")
     # thread: 'Thread' = Field(..., description="The thread that is running.")
     
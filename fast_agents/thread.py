@@ -1,23 +1,34 @@
 import asyncio
+import copy
+import inspect
 import json
-from typing import TYPE_CHECKING, Optional, Callable, AsyncGenerator, Any
+import uuid
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Optional, Callable, Any, Awaitable, NamedTuple
 
 from openai import AsyncOpenAI
 from openai.types import Reasoning
-from openai.types.responses import ResponseInputParam, ResponseTextConfigParam, ResponseFormatTextJSONSchemaConfigParam, \
-    ResponseOutputItem
+from openai.types.responses import ResponseInputParam, ResponseTextConfigParam, ResponseOutputItem
 from pydantic import ValidationError
 
+from fast_agents.checkpoint import Checkpointer
+from fast_agents.client_provider import ClientProvider, default_client_provider
+from fast_agents.compactor import Compactor
 from fast_agents.exceptions import MaxTurnsReachedException, RefusalException, InvalidJSONResponseException, \
-    InvalidPydanticSchemaResponseException, StreamingFailedException
-from fast_agents.helpers.input_filters import filter_ids, filter_status
+    InvalidPydanticSchemaResponseException, StreamingFailedException, CheckpointNotFoundException, ConfigurationException
+from fast_agents.hedge_policy import HedgePolicy
+from fast_agents.history import History
+from fast_agents.output_budget import OutputBudget, default_output_budget
+from fast_agents.helpers.input_filters import normalize_input
 from fast_agents.helpers.llm_context_helper import gather_contexts
-from fast_agents.helpers.schema_helper import format_parameters
-from fast_agents.helpers.tokenisor import num_tokens_from_string
+from fast_agents.helpers.prompt_cache_helper import derive_prompt_cache_key
+from fast_agents.helpers.tokenisor import encoding_name_for_model, count_tokens_many
+from fast_agents.rate_limiter import RateLimiter
+from fast_agents.retry_policy import RetryPolicy, StreamRetryEvent
 from fast_agents.run_context import RunContext
 from fast_agents.run_pipeline import RunPipeline
 from fast_agents.tool_response import ToolResponse
-from fast_agents import Tool
+from fast_agents.tool_scheduler import ToolScheduler, default_tool_scheduler
 
 if TYPE_CHECKING:
     from fast_agents.agent import Agent
@@ -25,33 +36,232 @@ if TYPE_CHECKING:
     from fast_agents.hook import Hook
     from pydantic import BaseModel
     from openai.types.responses import Response
-    
+
+# Stream events sent before the model produces output
+_STREAM_PREAMBLE_EVENTS = ("response.created", "response.in_progress", "response.queued")
+
+
+class PreparedTurn(NamedTuple):
+    contexts: Optional[str]   # LlmContext content, None without llm_contexts
+
+
 class Thread:
     def __init__(self,
                  agent: 'Agent',
-                 input: Optional[ResponseInputParam] = None,
+                 input: Optional[ResponseInputParam | History] = None,   # Copied into a History; pass a History to set its segment and spill settings
                  max_turns: int = 20,
                  context: Optional['BaseModel'] = None,
                  llm_contexts: Optional[list['LlmContext']] = None,
                  hooks: Optional[list['Hook']] = None,
                  max_input_tokens: Optional[int] = None,
+                 compactor: Optional[Compactor] = None,   # Summarize old history instead of dropping it beyond max_input_tokens
                  prompt_cache_key: Optional[str] = None,
                  run_pipelines: Optional[list[RunPipeline]] = None,
-                 openai_store_responses: Optional[bool] = True   # If True response objects are saved for 30 days. Opt out by setting to False. If using previous_response_id set True
+                 openai_store_responses: Optional[bool] = True,   # If True response objects are saved for 30 days. Opt out by setting to False. If using previous_response_id set True
+                 keep_response_objects: bool = False,   # If True original response output objects are kept in `response_objects`
+                 client: Optional[AsyncOpenAI] = None,   # Defaults to the shared pooled client of `client_provider`
+                 client_provider: Optional[ClientProvider] = None,
+                 tool_scheduler: Optional[ToolScheduler] = None,   # Concurrency limits and timeouts of tool calls
+                 output_budget: Optional[OutputBudget] = None,   # Token limits of tool outputs: truncate, elide or spill oversized ones
+                 tool_outputs_as_completed: bool = False,   # Yield tool outputs as each tool finishes instead of in call order
+                 speculative_tool_execution: bool = False,   # stream(): start tools as soon as their arguments are complete
+                 chain_responses: bool = False,   # With openai_store_responses, send only new items and chain turns via previous_response_id
+                 cache_friendly_layout: bool = False,   # Keep the request prefix stable: LlmContexts after history, derived prompt_cache_key
+                 overlap_turn_preparation: bool = False,   # Fetch LlmContexts and prepare history for the next turn while tools run
+                 rate_limiter: Optional[RateLimiter] = None,   # Shared RPM/TPM limits all requests of the thread wait for
+                 priority: int = 0,   # Rate limiter priority class, lower values are served first
+                 retry_policy: Optional[RetryPolicy] = None,   # Retry failed requests with backoff and fall back to Agent.fallback_models
+                 hedge_policy: Optional[HedgePolicy] = None,   # Send a duplicate of requests slower than recent ones, first to answer wins
+                 checkpointer: Optional[Checkpointer] = None,   # Persist state after each turn and tool call, see Thread.resume()
+                 thread_id: Optional[str] = None   # Id of the thread in the checkpoint store, generated when not given
                  ):
         self.agent = agent
         self.max_turns = max_turns
-        self.input = (input or []).copy()   # copy to avoid mutating the original input
+        self.input = input   # stored in wire format, see the `input` property
         self.context = context
         self.llm_contexts = llm_contexts
         self.hooks = hooks
         self.turn_count = 0 
         self.max_input_tokens = max_input_tokens
+        self.compactor = compactor
         self.prompt_cache_key = prompt_cache_key
         self.run_pipelines = run_pipelines
-        self.client = None
+        self.client = client
+        self.client_provider = client_provider or default_client_provider
+        self.tool_scheduler = tool_scheduler or default_tool_scheduler
+        self.output_budget = output_budget or default_output_budget
+        self.tool_outputs_as_completed = tool_outputs_as_completed
+        self.speculative_tool_execution = speculative_tool_execution
         self.openai_store_responses = openai_store_responses
+        self.keep_response_objects = keep_response_objects
+        self.response_objects: list[ResponseOutputItem] = []
+        self.chain_responses = chain_responses
+        self.cache_friendly_layout = cache_friendly_layout
+        self.overlap_turn_preparation = overlap_turn_preparation
+        self._prepared_turn: Optional[asyncio.Task] = None   # prepare_next_turn() started during tool execution
+        self.rate_limiter = rate_limiter
+        self.priority = priority
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
+        self.checkpointer = checkpointer
+        if checkpointer and self.output_budget.blob_store and not self.output_budget.blob_store.persistent:
+            raise ConfigurationException("Spilled tool outputs would be lost on resume. Give the OutputBudget a blob_store "
+                                         "with a directory, e.g. LocalBlobStore('spill'), when using a checkpointer.")
+        self.thread_id = thread_id or uuid.uuid4().hex
+        if checkpointer:
+            checkpointer.validate_thread_id(self.thread_id)
+        self._checkpoint_mark: Optional[tuple] = None   # History.mark() of the last checkpoint
+        self._resume_calls: list[tuple[str, str, str]] = []   # function calls without output when the thread was resumed
+        self._fork_mark: Optional[tuple] = None   # History.mark() of a forked thread's history when it was forked
+        self._parent_mark: Optional[tuple] = None   # History.mark() of the parent's history when this thread was forked from it
+        self.previous_response_id: Optional[str] = None
+        self._window_start = 0   # index of the oldest item of self.input sent in the current turn
+        self._contexts: Optional[str] = None   # LlmContext content sent in the current turn
+        self._turn_key: Optional[tuple] = None   # (agent, model, window start, contexts) of the current request
+        self._chain: Optional[tuple] = None   # (_turn_key, History.mark()) when previous_response_id was stored
         
+    @property
+    def input(self) -> History:
+        return self._input
+
+    @input.setter
+    def input(self, value: Optional[ResponseInputParam | History]) -> None:
+        """
+        Assigning a list (e.g. from a RunPipeline) copies it into a new History in normalized form, with the
+        settings of the current one. A History is forked, so the caller's stays unchanged.
+        """
+        if isinstance(value, History):
+            self._input = value.fork()
+        else:
+            current = getattr(self, "_input", None)
+            self._input = History(value or [], **current.settings()) if current is not None else History(value or [])
+
+    @classmethod
+    def resume(cls, thread_id: str, checkpointer: Checkpointer, agents: 'Agent | list[Agent]', **kwargs) -> 'Thread':
+        """
+        Rebuild a checkpointed thread. `agents` must contain every agent the thread may have handed off to.
+        Outputs of tool calls completed before the interruption are restored; only calls without output run again.
+        """
+        state = checkpointer.restore(thread_id)
+        if state is None:
+            raise CheckpointNotFoundException(f"No checkpoint for thread {thread_id}")
+
+        agents = agents if isinstance(agents, list) else [agents]
+        agent = next((agent for agent in agents if agent.name == state.agent_name), None) if state.agent_name else agents[0]
+        if agent is None:
+            raise ConfigurationException(f"Thread {thread_id} was checkpointed with agent {state.agent_name!r}, which is not in `agents`")
+
+        thread = cls(agent=agent, input=state.input, checkpointer=checkpointer, thread_id=thread_id, **kwargs)
+        thread.turn_count = state.turn_count
+        thread._checkpoint_mark = thread.input.mark()
+
+        answered = {item.get("call_id") for item in thread.input if item.get("type") == "function_call_output"}
+        for item in list(thread.input):
+            if item.get("type") != "function_call" or item["call_id"] in answered:
+                continue
+            if item["call_id"] in state.tool_outputs:
+                thread.add_input(state.tool_outputs[item["call_id"]])
+            else:
+                thread._resume_calls.append((item["name"], item["arguments"], item["call_id"]))
+        return thread
+
+    def fork(self, n: int = 2) -> list['Thread']:
+        """
+        Child threads continuing from the current state with the same configuration and client.
+        Their histories share the parent's items structurally, only items added afterwards are allocated per child.
+        A stored response chain carries over, so each child's first request sends only its new items.
+        """
+        if self._prepared_turn is not None:
+            raise RuntimeError("Cannot fork a thread while it is running")
+
+        children = []
+        for _ in range(n):
+            child = copy.copy(self)
+            child._input = self.input.fork()
+            child.context = self.context.model_copy(deep=True) if self.context is not None else None
+            child.response_objects = list(self.response_objects)
+            child.thread_id = uuid.uuid4().hex
+            child._checkpoint_mark = None
+            child._resume_calls = list(self._resume_calls)
+            child._fork_mark = child.input.mark()
+            child._parent_mark = self.input.mark()
+            if self._chain and self.input.appended_since(self._chain[1]):
+                child._chain = (self._chain[0], (child.input, child.input.generation, self._chain[1][2]))
+            else:
+                child._chain = None
+            children.append(child)
+        return children
+
+    def merge(self, child: 'Thread') -> None:
+        """
+        Adopt the state of a child created by `fork()`: its new items, context, agent, turn count and response chain.
+        Raises RuntimeError when the child was not forked from this thread or this thread's history changed since.
+        """
+        mark = child._parent_mark
+        if not (self.input.appended_since(mark) and len(self.input) == mark[2]):
+            raise RuntimeError("Cannot merge a child into a thread whose history changed since it was forked")
+
+        if child.input.appended_since(child._fork_mark):
+            self.input.extend(child.input[child._fork_mark[2]:])
+        else:
+            self._input = child.input   # the child rewrote its history
+
+        self.context = child.context
+        self.agent = child.agent
+        self.turn_count = child.turn_count
+        self.response_objects = child.response_objects
+        self._resume_calls = list(child._resume_calls)
+        self.previous_response_id = child.previous_response_id
+        if child._chain and child.input.appended_since(child._chain[1]) and len(self.input) == len(child.input):
+            self._chain = (child._chain[0], (self.input, self.input.generation, child._chain[1][2]))
+        else:
+            self._chain = None
+
+    async def fork_and_run(self,
+                           n: int,
+                           select: Optional[Callable[[list[tuple['Thread', Any]]], int | Awaitable[int]]] = None,
+                           ) -> Any:
+        """
+        Run `n` forks to completion concurrently and merge the selected one into this thread.
+        `select` receives (child, final output) pairs of the forks that succeeded and returns the index of the winner,
+        by default the first one. Returns the winner's final output.
+        """
+        children = self.fork(n)
+        outputs = await asyncio.gather(*[child.run_to_completion() for child in children], return_exceptions=True)
+
+        candidates = [(child, output) for child, output in zip(children, outputs) if not isinstance(output, BaseException)]
+        if not candidates:
+            raise outputs[0]
+
+        index = select(candidates) if select else 0
+        if inspect.isawaitable(index):
+            index = await index
+
+        winner, output = candidates[index]
+        self.merge(winner)
+        return output
+
+    def checkpoint(self) -> None:
+        """
+        Queue a checkpoint of the input added since the previous one. A rewritten history is checkpointed in full.
+        """
+        if not self.checkpointer:
+            return
+
+        start = self._checkpoint_mark[2] if self.input.appended_since(self._checkpoint_mark) else 0
+
+        self.checkpointer.write(self.thread_id, {
+            "type": "items", "start": start, "items": self.input[start:], "agent": self.agent.name, "turn_count": self.turn_count,
+        })
+        self._checkpoint_mark = self.input.mark()
+
+    def _checkpoint_tool_output(self, call_id: str, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.checkpointer.write(self.thread_id, {
+            "type": "tool_output", "call_id": call_id, "items": self.tool_output_items(call_id, task.result()),
+        })
+
     def create_run_context(self, run_input: list[ResponseInputParam]) -> 'RunContext':
         return RunContext(
             agent=self.agent,
@@ -61,6 +271,16 @@ class Thread:
             context=self.context
         )
 
+    def add_input(self, items: list, run_context: Optional['RunContext'] = None) -> ResponseInputParam:
+        """
+        Append items to the thread input (and the run context input) in normalized wire format.
+        """
+        normalized = normalize_input(items)
+        self.input.extend(normalized)
+        if run_context:
+            run_context.input.extend(normalized)
+        return normalized
+
     def collect_function_calls(self, response: 'Response') -> list[tuple[str, str, str]]:
         return [
             (output.name, output.arguments, output.call_id)
@@ -68,71 +288,219 @@ class Thread:
             if output.type == "function_call"
         ]
 
-    async def execute_tool_calls(self, function_calls: list[tuple[str, str, str]], run_context: 'RunContext', next_turn_coro: AsyncGenerator[ResponseOutputItem, Any]):
-        tool_responses = await asyncio.gather(
-            *[self.call_tool(name, args, run_context) for name, args, _ in function_calls])
-
-        # Add tool responses to input
-        for (name, args, call_id), response in zip(function_calls, tool_responses):
-            fn_output = {"type": "function_call_output", "call_id": call_id, "output": response.output_str}
-            self.input.append(fn_output)
-            run_context.input.append(fn_output)
-            yield fn_output
-            if response.additional_inputs:
-                for additional_input in response.additional_inputs:
-                    self.input.append(additional_input)
-                    run_context.input.append(additional_input)
-                    yield additional_input
-
-        # Recursively continue
-        async for output in next_turn_coro():
-            yield output
+    @staticmethod
+    def tool_output_items(call_id: str, response: ToolResponse) -> list:
+        fn_output = {"type": "function_call_output", "call_id": call_id, "output": response.output_str}
+        return [fn_output, *(response.additional_inputs or [])]
+
+    def _start_speculative_call(self, event: Any, added_calls: dict[int, Any], started: dict[str, tuple[tuple[str, str], asyncio.Task]], run_context: 'RunContext',
+                                carried: Optional[dict[tuple[str, str], list[asyncio.Task]]] = None):
+        """
+        Launch a tool as soon as the stream has delivered its complete arguments.
+        `carried` holds calls started by a failed attempt of the same request; a matching call reuses them instead of running the tool again.
+        """
+        et = getattr(event, "type", None)
+        item = getattr(event, "item", None)
+
+        if et == "response.output_item.added" and getattr(item, "type", None) == "function_call":
+            added_calls[event.output_index] = item
+            return
+        if et == "response.function_call_arguments.done":
+            item = added_calls.get(event.output_index)
+            arguments = getattr(event, "arguments", None)
+        elif et == "response.output_item.done" and getattr(item, "type", None) == "function_call":
+            arguments = item.arguments
+        else:
+            return
+
+        if item is None or arguments is None or item.call_id in started:
+            return
+        signature = (item.name, arguments)
+        if carried and carried.get(signature):
+            task = carried[signature].pop(0)
+        else:
+            task = asyncio.create_task(self.call_tool(item.name, arguments, run_context))
+        started[item.call_id] = (signature, task)
+
+    @staticmethod
+    def _cancel_unconfirmed_calls(function_calls: list[tuple[str, str, str]], started: dict[str, tuple[tuple[str, str], asyncio.Task]],
+                                  carried: dict[tuple[str, str], list[asyncio.Task]]) -> None:
+        """
+        Cancel speculative calls the final response does not contain with the same name and arguments,
+        so they stop using tool resources while the confirmed calls run.
+        """
+        confirmed = {call_id: (name, args) for name, args, call_id in function_calls}
+        for call_id, (signature, task) in list(started.items()):
+            if confirmed.get(call_id) != signature:
+                task.cancel()
+                del started[call_id]
+        for tasks in carried.values():
+            for task in tasks:
+                task.cancel()
+        carried.clear()
+
+    async def execute_tool_calls(self, function_calls: list[tuple[str, str, str]], run_context: 'RunContext', started: Optional[dict[str, tuple[tuple[str, str], asyncio.Task]]] = None):
+        """
+        Run function calls and yield their outputs.
+        `started` holds calls already launched speculatively; they are reused when name and arguments match the final response.
+        """
+        started = started or {}
+        tasks = []
+        for name, args, call_id in function_calls:
+            speculative = started.get(call_id)
+            if speculative and speculative[0] == (name, args):
+                tasks.append(speculative[1])
+            else:
+                tasks.append(asyncio.create_task(self.call_tool(name, args, run_context)))
+            if self.checkpointer:
+                tasks[-1].add_done_callback(lambda task, call_id=call_id: self._checkpoint_tool_output(call_id, task))
+        try:
+            if self.tool_outputs_as_completed:
+                async for output in self._tool_outputs_as_completed(function_calls, tasks, run_context):
+                    yield output
+                return
+
+            tool_responses = await asyncio.gather(*tasks)
+
+            # Add tool responses to input
+            for (name, args, call_id), response in zip(function_calls, tool_responses):
+                for item in self.tool_output_items(call_id, response):
+                    self.add_input([item], run_context)
+                    yield item
+        finally:
+            # Thread cancelled or a tool crashed: don't leave the other calls running
+            for task in tasks:
+                task.cancel()
+
+    async def _tool_outputs_as_completed(self, function_calls: list[tuple[str, str, str]], tasks: list[asyncio.Task], run_context: 'RunContext'):
+        """
+        Yield each tool's output as soon as it finishes.
+        Outputs are added to the input in call order, so the next request does not depend on completion order.
+        """
+        index_of = {task: i for i, task in enumerate(tasks)}
+        completed: list[Optional[list]] = [None] * len(tasks)
+        added = 0
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=index_of.get):
+                i = index_of[task]
+                completed[i] = self.tool_output_items(function_calls[i][2], task.result())
+                for item in completed[i]:
+                    yield item
+
+            # Add the longest completed prefix
+            while added < len(completed) and completed[added] is not None:
+                self.add_input(completed[added], run_context)
+                added += 1
+
+    def window_start(self) -> int:
+        """
+        Index of the oldest input item sent to the model.
+        With max_input_tokens it is the start of the latest items that fit into the budget; only items not seen before get tokenized.
+        Items are measured by the tokens of their JSON form (`History.serialized`), as sent on the wire.
+        """
+        if not self.max_input_tokens:
+            return 0
+        encoding_name = encoding_name_for_model(self.agent.model)
+        if not self._pinned_summary():
+            return self.input.start_index(self.max_input_tokens, encoding_name)
+
+        # The compaction summary is sent in front of the window, it takes its tokens from the budget
+        summary_tokens = self.input.token_count(0, 1, encoding_name)
+        return max(1, self.input.start_index(max(self.max_input_tokens - summary_tokens, 0), encoding_name))
+
+    def _pinned_summary(self) -> bool:
+        return bool(self.compactor and len(self.input) and self.compactor.is_summary(self.input[0]))
+
+    async def prepare_next_turn(self) -> PreparedTurn:
+        """
+        Work for the next request that does not depend on tool results, run while tools execute:
+        LlmContext content and token counts of the history known so far.
+        Contexts are therefore fetched before the tools finish.
+        Cancelling this stops fetching contexts, but token counting already running in a worker thread
+        finishes in the background; its counts are cached by the history and used by the next turn.
+        """
+        contexts_task = asyncio.create_task(gather_contexts(self.llm_contexts, self.context)) if self.llm_contexts else None
+        try:
+            if self.max_input_tokens or self.compactor:
+                await asyncio.to_thread(self.input.count_tokens, encoding_name_for_model(self.agent.model))
+
+            return PreparedTurn(contexts=await contexts_task if contexts_task else None)
+        finally:
+            if contexts_task:
+                contexts_task.cancel()   # no-op once done
+
+    async def _take_prepared_turn(self) -> Optional[PreparedTurn]:
+        task, self._prepared_turn = self._prepared_turn, None
+        if task is None:
+            return None
+        try:
+            return await task
+        except Exception:
+            return None   # prepared work is an optimization only, redo it the regular way
 
     async def get_run_input(self) -> list[ResponseInputParam]:     
         # TODO: refactor this to custom modular function and put into helpers like max_tokens max_messages etc.
-        selected_inputs = []          
-
-        if self.max_input_tokens: 
-            remaining_tokens = self.max_input_tokens
-            current_tokens = 0
-            
-            # Go through messages in reverse order (latest first)
-            for msg in reversed(self.input):
-                msg_tokens = num_tokens_from_string(str(msg))
-                if current_tokens + msg_tokens <= remaining_tokens:
-                    selected_inputs.insert(0, msg)  # Insert at beginning to maintain order
-                    current_tokens += msg_tokens
-                else:
-                    break
+        prepared = await self._take_prepared_turn()
+        if self.compactor:
+            await self.compactor.compact(self)
+        self._window_start = self.window_start()
+
+        # Items are normalized when they enter the history, this is only a list of references
+        run_input = self.input[self._window_start:]
+        if self._window_start > 0 and self._pinned_summary():
+            run_input.insert(0, self.input[0])
+
+        # Combine contexts with selected input messages
+        if prepared is not None:
+            contexts = prepared.contexts
         else:
-            selected_inputs = self.input
-        
-        # Combine contexts (at start) with selected input messages
-        contexts = await gather_contexts(self.llm_contexts) if self.llm_contexts else None
+            contexts = await gather_contexts(self.llm_contexts, self.context) if self.llm_contexts else None
+        self._contexts = contexts
 
         if contexts:
-            selected_inputs.insert(0, {"role": "system", "content": contexts})
+            context_message = {"role": "system", "content": contexts}
+            if self.cache_friendly_layout:
+                # Volatile content after the history so the cached prefix survives context changes
+                run_input.append(context_message)
+            else:
+                run_input.insert(0, context_message)
 
-        return filter_ids(filter_status(selected_inputs))
+        return run_input
+
+    def chained_input(self) -> Optional[list[ResponseInputParam]]:
+        """
+        Items added since the previous stored response, to be sent with its previous_response_id.
+        None when chaining is off or the chain is broken: the agent or model changed (e.g. a handoff or a RunPipeline),
+        the max_input_tokens window moved, LlmContext content changed or the history before the new items was rewritten.
+        """
+        if not (self.chain_responses and self.previous_response_id and self._chain):
+            return None
+
+        (agent, model, window_start, contexts), mark = self._chain
+        if agent is not self.agent or model != self.agent.model or window_start != self._window_start or contexts != self._contexts:
+            return None
+        if not self.input.appended_since(mark) or len(self.input) == mark[2]:
+            return None
+
+        return self.input[mark[2]:]
 
     def get_output_format(self) -> ResponseTextConfigParam:
-        if output_type := self.agent.output_type:
-            return ResponseTextConfigParam(
-                format=ResponseFormatTextJSONSchemaConfigParam(
-                    type="json_schema",
-                    name=output_type.__name__,
-                    description=output_type.__doc__,
-                    schema=format_parameters(output_type),
-                    strict=True
-                )
-            )
-
-        return ResponseTextConfigParam(
-            format={"type": "text"}
-        )
+        return self.agent.tool_registry.output_format
+
+    def get_prompt_cache_key(self) -> Optional[str]:
+        if self.prompt_cache_key or not self.cache_friendly_layout:
+            return self.prompt_cache_key
+        return derive_prompt_cache_key(self.agent.instructions, self.agent.tool_registry.digest)
 
     def tool_definitions(self) -> list[dict]:
-        return [tool.tool_definition if isinstance(tool, Tool) else tool for tool in self.agent.tools]
+        definitions = list(self.agent.tool_registry.definitions)
+        read_tool = self.output_budget.read_tool
+        if read_tool and read_tool.name not in self.agent.tool_registry:
+            definitions.append(read_tool.tool_definition)   # after the agent's tools, so the cached prefix stays the same
+        return definitions
 
     async def parse_structured_output(self, output: ResponseOutputItem) -> 'BaseModel':
         content = output.content[0]
@@ -148,41 +516,28 @@ class Thread:
             raise InvalidPydanticSchemaResponseException(str(e))
 
     async def call_tool(self, name: str, args: str, run_context: 'RunContext') -> ToolResponse:
-        for tool in self.agent.tools:
-            if tool.name == name:
-                try:
-                    parsed_args = json.loads(args)
-                except json.JSONDecodeError:
-                    return ToolResponse(output=f"Invalid JSON: {args}", is_error=True)
+        tool = self.agent.tool_registry.get(name)
+        if tool is None and self.output_budget.read_tool and name == self.output_budget.read_tool.name:
+            tool = self.output_budget.read_tool
+        if tool is None:
+            return ToolResponse(output=f"No tool found with name {name}", is_error=True)
 
-                # Create a new instance of the tool for each call
-                response = await tool.__class__().arun(**parsed_args, run_context=run_context)
-                return response
+        try:
+            parsed_args = json.loads(args)
+        except json.JSONDecodeError:
+            return ToolResponse(output=f"Invalid JSON: {args}", is_error=True)
 
-        return ToolResponse(output=f"No tool found with name {name}", is_error=True)
+        # Create a new instance of the tool for each call
+        response = await self.tool_scheduler.run(tool, lambda: tool.__class__().arun(**parsed_args, run_context=run_context))
+        return await self.output_budget.apply(tool, response, encoding_name_for_model(self.agent.model))
 
     def verify_max_turns(self):
         if self.turn_count > self.max_turns:
             raise MaxTurnsReachedException()
         self.turn_count += 1
 
-    async def run(self):
-        self.verify_max_turns()
-
-        if not self.client:
-            self.client = AsyncOpenAI()
-
-        if self.run_pipelines:
-            await asyncio.gather(*[pipeline.preflight(self) for pipeline in self.run_pipelines])
-
-        run_input = await self.get_run_input()
-
-        run_context = self.create_run_context(run_input)
-
-        if self.hooks:
-            await asyncio.gather(*[hook.on_start(run_context) for hook in self.hooks])
-
-        response = await self.client.responses.create(
+    def request_params(self, run_input: list[ResponseInputParam], stream: bool = False, previous_response_id: Optional[str] = None) -> dict:
+        params = dict(
             model=self.agent.model,
             instructions=self.agent.instructions,
             input=run_input,
@@ -190,38 +545,118 @@ class Thread:
             temperature=self.agent.temperature,
             truncation="auto",
             text=self.get_output_format(),
-            prompt_cache_key=self.prompt_cache_key,
-            store=self.openai_store_responses, 
+            prompt_cache_key=self.get_prompt_cache_key(),
+            # Streamed responses are only stored when they are chained
+            store=self.openai_store_responses if not stream or self.chain_responses else False,
             reasoning=Reasoning(effort=self.agent.reasoning_effort) if getattr(self.agent, 'reasoning_effort', None) else None,
         )
+        if previous_response_id:
+            params["previous_response_id"] = previous_response_id
+        return params
 
-        # Yield parts of the response
-        for output in response.output:
-            yield output
-
-        self.input.extend(response.output)
-        run_context.input.extend(response.output)
-
-        if self.hooks:
-            await asyncio.gather(*[hook.on_end(run_context, response) for hook in self.hooks])
-
-        if self.run_pipelines:
-            await asyncio.gather(*[pipeline.postflight(self, response) for pipeline in self.run_pipelines])
-
-        # Execute all function calls 
-        if function_calls := self.collect_function_calls(response):
-            async for output in self.execute_tool_calls(function_calls, run_context, next_turn_coro=self.run):
-                yield output
+    def estimate_request_tokens(self, params: dict) -> int:
+        """
+        Estimated input tokens of a request, used to reserve rate limit capacity before sending it.
+        History items and the agent's tool definitions use cached token counts, only the rest is tokenized.
+        """
+        encoding_name = encoding_name_for_model(params.get("model"))
+        parts = [params.get("instructions") or ""]
+        tools = params.get("tools") or []
+        registry = self.agent.tool_registry
+        tools_tokens = 0
+        if registry.definitions and len(tools) >= len(registry.definitions) and all(a is b for a, b in zip(tools, registry.definitions)):
+            tools_tokens = registry.token_count(encoding_name)
+            tools = tools[len(registry.definitions):]   # e.g. read_tool_output
+        if tools:
+            parts.append(json.dumps(tools, default=str))
+
+        history_tokens = 0
+        if params.get("previous_response_id"):
+            parts.append(json.dumps(params["input"], default=str))
+        else:
+            history_tokens = self.input.token_count(self._window_start, encoding_name=encoding_name_for_model(self.agent.model))
+            if self._window_start > 0 and self._pinned_summary():
+                history_tokens += self.input.token_count(0, 1, encoding_name=encoding_name_for_model(self.agent.model))
+            parts.append(self._contexts or "")
+        return history_tokens + tools_tokens + sum(count_tokens_many(parts, encoding_name))
 
-    async def stream(self):
+    def retry_delay(self, error: Exception, params: dict, attempts: dict[str, int]) -> Optional[float]:
         """
-        Async generator that streams model events while preserving Thread semantics.
-        Yields a normalized set of streaming events and finalized items.
+        Seconds to wait before retrying a failed request, or None when it must not be retried.
+        Switches `params` to the next untried fallback model when the current one is overloaded or out of attempts.
+        `attempts` counts failed attempts per model within the turn.
+        """
+        policy = self.retry_policy
+        if not policy or not policy.is_retryable(error):
+            return None
+
+        model = params["model"]
+        attempts[model] = attempts.get(model, 0) + 1
+        if policy.is_overloaded(error) or attempts[model] >= policy.max_attempts:
+            fallbacks = [fallback for fallback in self.agent.fallback_models if fallback not in attempts and fallback != model]
+            if fallbacks:
+                params["model"] = fallbacks[0]
+                return 0.0
+
+        if attempts[model] >= policy.max_attempts:
+            return None
+        return policy.delay_for(error, attempts[model])
+
+    async def send_request(self, params: dict) -> 'Response':
+        if self.hedge_policy:
+            return await self.hedge_policy.run(lambda request_params: self.client.responses.create(**request_params), params)
+        return await self.client.responses.create(**params)
+
+    async def open_stream(self, params: dict) -> tuple[Any, Any, list]:
+        """
+        Open a response stream and read it up to the first output event.
+        Returns the entered stream manager, the stream and the events read so far; the caller must exit the manager.
+        """
+        manager = self.client.responses.stream(**params)
+        s = await manager.__aenter__()
+        events = []
+        try:
+            while not events or getattr(events[-1], "type", None) in _STREAM_PREAMBLE_EVENTS:
+                events.append(await s.__anext__())
+        except StopAsyncIteration:
+            pass
+        except BaseException as e:
+            await manager.__aexit__(type(e), e, e.__traceback__)
+            raise
+        return manager, s, events
+
+    @staticmethod
+    async def _close_stream(opened: tuple[Any, Any, list]) -> None:
+        await opened[0].__aexit__(None, None, None)
+
+    async def enter_stream(self, params: dict, stack: AsyncExitStack) -> tuple[Any, list]:
+        """
+        Open a streamed request, hedged up to the first output event when a hedge_policy is set.
+        Returns the stream, exited with `stack`, and the events already read from it.
+        """
+        if self.hedge_policy:
+            manager, s, events = await self.hedge_policy.run(self.open_stream, params, release=self._close_stream)
+        else:
+            manager, s, events = await self.open_stream(params)
+        stack.push_async_exit(manager)
+        return s, events
+
+    @staticmethod
+    async def _replay(events: list, s: Any):
+        for event in events:
+            yield event
+        async for event in s:
+            yield event
+
+    async def start_turn(self, stream: bool = False) -> tuple['RunContext', dict]:
+        """
+        Everything that happens before a request is sent: turn accounting, preflight pipelines, input and on_start hooks.
+        Returns the run context and the request parameters.
         """
         self.verify_max_turns()
 
         if not self.client:
-            self.client = AsyncOpenAI()
+            self.client = self.client_provider.get()
 
         if self.run_pipelines:
             await asyncio.gather(*[pipeline.preflight(self) for pipeline in self.run_pipelines])
@@ -233,30 +668,31 @@ class Thread:
         if self.hooks:
             await asyncio.gather(*[hook.on_start(run_context) for hook in self.hooks])
 
-        async with self.client.responses.stream(
-            model=self.agent.model,
-            instructions=self.agent.instructions,
-            input=run_input,
-            tools=self.tool_definitions(),
-            temperature=self.agent.temperature,
-            truncation="auto",
-            text=self.get_output_format(),
-            prompt_cache_key=self.prompt_cache_key,
-            store=False,
-            reasoning=Reasoning(effort=self.agent.reasoning_effort) if getattr(self.agent, 'reasoning_effort', None) else None,
-        ) as s:
-            async for event in s:
-                et = getattr(event, "type", None)
-                if et == "response.failed":
-                    error = getattr(event, "error", "Streaming failed")
-                    raise StreamingFailedException(str(error))
-
-                yield event
+        if (chained_input := self.chained_input()) is not None:
+            params = self.request_params(chained_input, stream, previous_response_id=self.previous_response_id)
+        else:
+            params = self.request_params(run_input, stream)
+        self._turn_key = (self.agent, self.agent.model, self._window_start, self._contexts)
 
-            response = await s.get_final_response()
+        return run_context, params
 
-        self.input.extend(response.output)
-        run_context.input.extend(response.output)
+    async def end_turn(self, run_context: 'RunContext', response: 'Response') -> list[tuple[str, str, str]]:
+        """
+        Record the response and run on_end hooks and postflight pipelines.
+        Returns function calls that have to be executed before the next turn.
+        """
+        self.add_input(response.output, run_context)
+        if self.keep_response_objects:
+            self.response_objects.extend(response.output)
+
+        # Stored responses can be continued with previous_response_id
+        response_id = getattr(response, "id", None)
+        if self.chain_responses and self.openai_store_responses and response_id and self.input:
+            self.previous_response_id = response_id
+            self._chain = (self._turn_key, self.input.mark())
+        else:
+            self.previous_response_id = None
+            self._chain = None
 
         if self.hooks:
             await asyncio.gather(*[hook.on_end(run_context, response) for hook in self.hooks])
@@ -264,9 +700,117 @@ class Thread:
         if self.run_pipelines:
             await asyncio.gather(*[pipeline.postflight(self, response) for pipeline in self.run_pipelines])
 
-        if function_calls := self.collect_function_calls(response):
-            async for output in self.execute_tool_calls(function_calls, run_context, next_turn_coro=self.stream):
+        return self.collect_function_calls(response)
+
+    async def _turns(self, stream: bool):
+        """
+        Turn loop shared by `run` and `stream`.
+        Iterates instead of recursing, so each turn's frames are released before the next one starts.
+        """
+        if self._resume_calls:
+            # Calls of a resumed thread that never completed
+            function_calls, self._resume_calls = self._resume_calls, []
+            async for output in self.execute_tool_calls(function_calls, self.create_run_context(self.input[:])):
                 yield output
+            self.checkpoint()
+
+        try:
+            while True:
+                run_context, params = await self.start_turn(stream)
+                started: dict[str, tuple[tuple[str, str], asyncio.Task]] = {}   # speculative calls: call_id -> ((name, arguments), task)
+                carried: dict[tuple[str, str], list[asyncio.Task]] = {}   # speculative calls of failed attempts: (name, arguments) -> tasks
+                attempts: dict[str, int] = {}   # failed attempts per model
+
+                try:
+                    while True:
+                        reserved = await self.rate_limiter.acquire(self.estimate_request_tokens(params), self.priority) if self.rate_limiter else 0
+
+                        try:
+                            if stream:
+                                # A retried stream starts over, after a StreamRetryEvent when events of the failed attempt were yielded
+                                added_calls: dict[int, Any] = {}
+                                yielded = False
+                                async with AsyncExitStack() as stack:
+                                    s, events = await self.enter_stream(params, stack)
+                                    async for event in self._replay(events, s):
+                                        et = getattr(event, "type", None)
+                                        if et == "response.failed":
+                                            error = getattr(event, "error", "Streaming failed")
+                                            raise StreamingFailedException(str(error))
+
+                                        if self.speculative_tool_execution:
+                                            self._start_speculative_call(event, added_calls, started, run_context, carried)
+
+                                        yielded = True
+                                        yield event
+
+                                    response = await s.get_final_response()
+                            else:
+                                response = await self.send_request(params)
+                            break
+                        except Exception as error:
+                            if self.rate_limiter:
+                                self.rate_limiter.reconcile(reserved, 0)   # the next attempt reserves again
+                            failed_model = params["model"]
+                            delay = self.retry_delay(error, params, attempts)
+                            if delay is None:
+                                raise
+
+                            if stream and yielded:
+                                yield StreamRetryEvent(error=f"{type(error).__name__}: {error}", failed_model=failed_model, model=params["model"], delay=delay)
+
+                            # Tools started by the failed attempt are kept for the retry, never run twice
+                            for signature, task in started.values():
+                                carried.setdefault(signature, []).append(task)
+                            started.clear()
+                            await asyncio.sleep(delay)
+
+                    if not stream:
+                        # Yield parts of the response
+                        for output in response.output:
+                            yield output
+
+                    if self.rate_limiter:
+                        usage = getattr(response, "usage", None)
+                        self.rate_limiter.reconcile(reserved, getattr(usage, "total_tokens", None) or reserved)
+
+                    # Execute all function calls, then continue with the next turn
+                    function_calls = await self.end_turn(run_context, response)
+                    self._cancel_unconfirmed_calls(function_calls, started, carried)
+                    self.checkpoint()
+                    if not function_calls:
+                        return
+
+                    if self.overlap_turn_preparation:
+                        self._prepared_turn = asyncio.create_task(self.prepare_next_turn())
+
+                    async for output in self.execute_tool_calls(function_calls, run_context, started):
+                        yield output
+                    self.checkpoint()
+                finally:
+                    # Speculative calls not confirmed yet, when the turn ended early
+                    for _, task in started.values():
+                        task.cancel()
+                    for tasks in carried.values():
+                        for task in tasks:
+                            task.cancel()
+        finally:
+            # Max turns, an error or a consumer that stopped early: don't leave the prepared turn running
+            if self._prepared_turn is not None:
+                self._prepared_turn.cancel()
+                self._prepared_turn = None
+
+    async def run(self):
+        async for output in self._turns(stream=False):
+            yield output
+
+    async def stream(self):
+        """
+        Async generator that streams model events while preserving Thread semantics.
+        Yields a normalized set of streaming events and finalized items.
+        """
+        async for event in self._turns(stream=True):
+            yield event
             
     async def run_to_completion(self):
         """
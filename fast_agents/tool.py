@@ -24,6 +24,13 @@ class Tool(ABC):
     # Whether to treat inputs as partial updates (exclude unset fields)
     partial: ClassVar[bool] = False
 
+    # Max concurrent calls of this tool and seconds per call (enforced by ToolScheduler, None = unbounded)
+    max_concurrency: ClassVar[Optional[int]] = None
+    timeout: ClassVar[Optional[float]] = None
+
+    # Tokens of output sent to the agent, longer outputs are shortened (enforced by OutputBudget, None = the budget's default)
+    max_output_tokens: ClassVar[Optional[int]] = None
+
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         # Default sensible metadata
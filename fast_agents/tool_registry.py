@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Optional, Type
+
+from openai.types.responses import ResponseTextConfigParam, ResponseFormatTextJSONSchemaConfigParam
+
+from fast_agents.helpers.prompt_cache_helper import tools_digest
+from fast_agents.helpers.schema_helper import format_parameters
+from fast_agents.helpers.tokenisor import count_tokens_many
+from fast_agents.tool import Tool
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+
+class ToolRegistry:
+    """
+    Compiled view of an agent's tools: name lookup, tool definitions and output format are built once.
+
+    A registry is valid for the exact `tools` list object (and its length) and `output_type` it was built from.
+    Assigning a new list, appending/removing tools or changing `output_type` makes `Agent.tool_registry` rebuild it.
+    Replacing a tool in place (`agent.tools[0] = other`) is not detected; assign a new list instead.
+    """
+
+    def __init__(self, tools: list[Tool | dict], output_type: Optional[Type[BaseModel]] = None):
+        self._tools_list = tools
+        self._size = len(tools)
+        self.output_type = output_type
+
+        self._by_name: dict[str, Tool] = {}
+        for tool in tools:
+            if isinstance(tool, Tool):
+                self._by_name.setdefault(tool.name, tool)   # first tool with a given name wins
+
+        self.definitions: tuple[dict, ...] = tuple(tool.tool_definition if isinstance(tool, Tool) else tool for tool in tools)
+        self.output_format: ResponseTextConfigParam = self._build_output_format(output_type)
+        self._digest: Optional[str] = None
+        self._token_counts: dict[str, int] = {}   # encoding name -> tokens of the JSON definitions
+
+    @property
+    def digest(self) -> str:
+        """
+        Hash of tool definitions and output format, used to derive prompt cache keys.
+        """
+        if self._digest is None:
+            self._digest = tools_digest([*self.definitions, self.output_format])
+        return self._digest
+
+    def token_count(self, encoding_name: str) -> int:
+        """
+        Tokens of the tool definitions as JSON, counted once per encoding for request token estimates.
+        """
+        count = self._token_counts.get(encoding_name)
+        if count is None:
+            count = self._token_counts[encoding_name] = count_tokens_many([json.dumps(list(self.definitions), default=str)], encoding_name)[0]
+        return count
+
+    @staticmethod
+    def _build_output_format(output_type: Optional[Type[BaseModel]]) -> ResponseTextConfigParam:
+        if output_type:
+            return ResponseTextConfigParam(
+                format=ResponseFormatTextJSONSchemaConfigParam(
+                    type="json_schema",
+                    name=output_type.__name__,
+                    description=output_type.__doc__,
+                    schema=format_parameters(output_type),
+                    strict=True
+                )
+            )
+
+        return ResponseTextConfigParam(
+            format={"type": "text"}
+        )
+
+    def is_valid_for(self, tools: list[Tool | dict], output_type: Optional[Type[BaseModel]]) -> bool:
+        return tools is self._tools_list and len(tools) == self._size and output_type is self.output_type
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._by_name.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
@@ -10,6 +10,7 @@ class ToolResponse(BaseModel):
     output: Union[dict, str, int, list] = Field(..., description="Data to be sent to the agent from the tool as response.")
     is_error: bool = Field(False, description="Indicates if the response is an error.")
     additional_inputs: Optional[ResponseInputParam] = Field(None, description="Data to be appended after function call result to the input of the agent.")
+    budgeted_output: Optional[str] = Field(None, description="Output shortened by an OutputBudget, sent to the agent instead of `output`.")
 
     @field_validator('output')
     @classmethod
@@ -18,6 +19,9 @@ class ToolResponse(BaseModel):
 
     @property
     def output_str(self) -> str:
+        if self.budgeted_output is not None:
+            return self.budgeted_output
+
         dump = json.dumps(self.model_dump(include={'output'}), default=str)
         if self.is_error:
             return f"[Error] {dump}"
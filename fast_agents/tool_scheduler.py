@@ -0,0 +1,71 @@
+import asyncio
+import weakref
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from fast_agents.tool_response import ToolResponse
+
+if TYPE_CHECKING:
+    from fast_agents.tool import Tool
+
+
+class ToolScheduler:
+    """
+    Bounds tool execution: a global cap on concurrent calls, per-tool caps and per-call timeouts.
+
+    Per-tool limits and timeouts default to the `max_concurrency` / `timeout` ClassVars of the tool
+    and can be overridden by tool name without touching tool code. A scheduler shared by several
+    threads (e.g. `default_tool_scheduler`) enforces its limits across all of them.
+    """
+
+    def __init__(self,
+                 max_concurrency: Optional[int] = None,   # max tool calls running at once, None = unbounded
+                 timeout: Optional[float] = None,   # default seconds per call, None = no timeout
+                 tool_limits: Optional[dict[str, int]] = None,   # tool name -> max concurrent calls
+                 tool_timeouts: Optional[dict[str, float]] = None   # tool name -> seconds per call
+                 ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.tool_limits = tool_limits or {}
+        self.tool_timeouts = tool_timeouts or {}
+        # Semaphores are bound to the loop they are used on
+        self._semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, asyncio.Semaphore]]' = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, key: Optional[str], limit: int) -> asyncio.Semaphore:
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        semaphore = semaphores.get((key, limit))
+        if semaphore is None:
+            semaphore = semaphores[(key, limit)] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def limit_for(self, tool: 'Tool') -> Optional[int]:
+        return self.tool_limits.get(tool.name, tool.max_concurrency)
+
+    def timeout_for(self, tool: 'Tool') -> Optional[float]:
+        if tool.name in self.tool_timeouts:
+            return self.tool_timeouts[tool.name]
+        return tool.timeout if tool.timeout is not None else self.timeout
+
+    async def run(self, tool: 'Tool', call: Callable[[], Awaitable[ToolResponse]]) -> ToolResponse:
+        """
+        Run `call` once a slot is free. The timeout applies to execution only, not to waiting for a slot.
+        """
+        async with AsyncExitStack() as stack:
+            # Tool slot first: calls waiting for a saturated tool must not hold global slots other tools could use
+            if limit := self.limit_for(tool):
+                await stack.enter_async_context(self._semaphore(tool.name, limit))
+            if self.max_concurrency:
+                await stack.enter_async_context(self._semaphore(None, self.max_concurrency))
+
+            timeout = self.timeout_for(tool)
+            scope = asyncio.timeout(timeout)
+            try:
+                async with scope:
+                    return await call()
+            except TimeoutError:
+                if not scope.expired():
+                    raise   # raised by the tool itself
+                return ToolResponse(output=f"Tool {tool.name} timed out after {timeout} seconds.", is_error=True)
+
+
+default_tool_scheduler = ToolScheduler()
@@ -27,6 +27,63 @@ class MockResponse:
         self.output = output or [MockResponseOutputItem()]
 
 
+def text_response(text: str = "done") -> MockResponse:
+    """Mock response with a single text output."""
+    return MockResponse([MockResponseOutputItem(item_type="text", content=text)])
+
+
+def mock_client(*responses) -> MagicMock:
+    """Mock OpenAI client returning `responses` (or raising them, for exceptions) in order."""
+    client = MagicMock()
+    client.responses.create = AsyncMock(side_effect=list(responses))
+    return client
+
+
+def make_thread(agent=None, input=None, responses=None, **kwargs):
+    """Thread of a gpt-4 agent; with `responses` its client is a `mock_client` returning them."""
+    from fast_agents import Agent, Thread
+
+    thread = Thread(agent=agent or Agent(model="gpt-4"), input=input if input is not None else [], **kwargs)
+    if responses is not None:
+        thread.client = mock_client(*responses)
+    return thread
+
+
+def make_items(n: int, start: int = 0) -> list[dict]:
+    """User messages "message 000", "message 001", ... of equal length."""
+    return [{"role": "user", "content": f"message {i:03}"} for i in range(start, start + n)]
+
+
+class CharEncoding:
+    """Tokenizer stand-in with one token per character."""
+
+    def encode_ordinary(self, text):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture
+def char_tokens(monkeypatch):
+    """
+    Count one token per character instead of using tiktoken, whose encodings may not be available offline.
+    Returns the strings counted through count_tokens_many.
+    """
+    counted = []
+
+    def count(strings, encoding_name=None):
+        strings = list(strings)
+        counted.extend(strings)
+        return [len(s) for s in strings]
+
+    for module in ("history", "thread", "tool_registry"):
+        monkeypatch.setattr(f"fast_agents.{module}.count_tokens_many", count)
+    for module in ("compactor", "output_budget"):
+        monkeypatch.setattr(f"fast_agents.{module}.get_encoding", lambda encoding_name=None: CharEncoding())
+    return counted
+
+
 @pytest.fixture
 def mock_openai_client():
     """Create a mock OpenAI client with async response creation."""
@@ -101,4 +101,44 @@ class TestAgent:
             tools=[tool1, tool2]
         )
         
-        assert len(agent_with_tools.tools) == 2
\ No newline at end of file
+        assert len(agent_with_tools.tools) == 2
+
+    def test_tool_registry_is_cached_and_invalidated(self):
+        """Test the compiled tool registry is reused until tools or output_type change."""
+
+        class DummySchema(BaseModel):
+            value: str
+
+        class FirstTool(Tool):
+            name = "first"
+            description = "first tool"
+            schema = DummySchema
+
+            async def handle(self, **kwargs) -> ToolResponse:
+                return ToolResponse(output="first")
+
+        class SecondTool(FirstTool):
+            name = "second"
+            description = "second tool"
+
+        class OutputSchema(BaseModel):
+            result: str
+
+        first = FirstTool()
+        agent = Agent(name="test", instructions="test", tools=[first, {"type": "web_search_preview"}])
+
+        registry = agent.tool_registry
+        assert agent.tool_registry is registry
+        assert registry.get("first") is first
+        assert registry.get("missing") is None
+        assert [d.get("name") for d in registry.definitions] == ["first", None]
+        assert registry.output_format == {"format": {"type": "text"}}
+
+        agent.tools.append(SecondTool())
+        assert agent.tool_registry is not registry
+        assert "second" in agent.tool_registry
+
+        registry = agent.tool_registry
+        agent.output_type = OutputSchema
+        assert agent.tool_registry is not registry
+        assert agent.tool_registry.output_format["format"]["name"] == "OutputSchema"
@@ -0,0 +1,138 @@
+"""
+Tests for the Batch API backend against a local stand-in of the files and batches endpoints.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+from fast_agents import Agent, BatchApiRunner, Thread, Tool, ToolResponse
+
+
+def _response(output):
+    return {
+        "id": "resp", "object": "response", "created_at": 0, "model": "gpt-4", "output": output,
+        "parallel_tool_calls": True, "tool_choice": "auto", "tools": [],
+    }
+
+
+def _message(text):
+    return {"type": "message", "id": "msg", "role": "assistant", "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]}
+
+
+class FakeBatchApi:
+    """
+    Accepts batch input files and completes every batch at once with results of `handler(body)`.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.files: dict[str, str] = {}
+        self.batches: list[list[dict]] = []
+        self.files_api = SimpleNamespace(create=self.create_file, content=self.file_content)
+        self.batches_api = SimpleNamespace(create=self.create_batch, retrieve=self.retrieve_batch)
+
+    @property
+    def client(self):
+        return SimpleNamespace(files=self.files_api, batches=self.batches_api)
+
+    async def create_file(self, file, purpose):
+        assert purpose == "batch"
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = file[1].decode()
+        return SimpleNamespace(id=file_id)
+
+    async def file_content(self, file_id):
+        return SimpleNamespace(text=self.files[file_id])
+
+    async def create_batch(self, input_file_id, endpoint, completion_window):
+        assert endpoint == "/v1/responses"
+        requests = [json.loads(line) for line in self.files[input_file_id].splitlines()]
+        self.batches.append(requests)
+
+        output = []
+        for request in requests:
+            status, body = self.handler(request["body"])
+            output.append(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": status, "body": body}}))
+        output_id = f"file-{len(self.files)}"
+        self.files[output_id] = "\n".join(output)
+        return SimpleNamespace(id=f"batch-{len(self.batches)}", status="validating", output_file_id=output_id, error_file_id=None)
+
+    async def retrieve_batch(self, batch_id):
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id=f"file-{int(batch_id.split('-')[1]) * 2 - 1}", error_file_id=None)
+
+
+class UpperSchema(BaseModel):
+    text: str
+
+
+class UpperTool(Tool):
+    name = "upper"
+    description = "Uppercase text"
+    schema = UpperSchema
+
+    async def handle(self, text: str, **kwargs) -> ToolResponse:
+        return ToolResponse(output=text.upper())
+
+
+def _tool_handler(body):
+    last = body["input"][-1]
+    if last.get("type") == "function_call_output":
+        return 200, _response([_message(json.loads(last["output"])["output"]["message"])])
+    text = last["content"][0]["text"] if isinstance(last["content"], list) else last["content"]
+    if text == "fail":
+        return 500, {"error": {"message": "server error"}}
+    return 200, _response([{"type": "function_call", "call_id": "call_1", "name": "upper", "arguments": json.dumps({"text": text})}])
+
+
+@pytest.mark.asyncio
+async def test_threads_run_in_batch_rounds():
+    api = FakeBatchApi(_tool_handler)
+    agent = Agent(model="gpt-4", tools=[UpperTool()])
+    threads = [Thread(agent=agent, input=[{"role": "user", "content": text}]) for text in ("a", "b", "fail")]
+
+    runner = BatchApiRunner(client=api.client, poll_interval=0)
+    results = await runner.run(threads)
+
+    assert [result.output for result in results[:2]] == ["A", "B"]
+    assert "server error" in results[2].error
+    # First turns of all threads in one batch, second turns of the successful ones in the next
+    assert [len(requests) for requests in api.batches] == [3, 2]
+    assert len(runner.batch_ids) == 2
+
+
+@pytest.mark.asyncio
+async def test_request_lines_are_responses_requests():
+    api = FakeBatchApi(lambda body: (200, _response([_message("done")])))
+    thread = Thread(agent=Agent(model="gpt-4", instructions="be brief"), input=[{"role": "user", "content": "hi"}])
+
+    results = await BatchApiRunner(client=api.client, poll_interval=0).run([thread])
+
+    assert results[0].output == "done"
+    request = api.batches[0][0]
+    assert request["method"] == "POST" and request["url"] == "/v1/responses"
+    assert request["body"]["model"] == "gpt-4"
+    assert request["body"]["instructions"] == "be brief"
+    assert "temperature" not in request["body"]
+
+
+@pytest.mark.asyncio
+async def test_batch_turns_are_checkpointed(tmp_path):
+    from fast_agents import Checkpointer, FileCheckpointStore
+
+    checkpointer = Checkpointer(FileCheckpointStore(tmp_path))
+    api = FakeBatchApi(_tool_handler)
+    thread = Thread(agent=Agent(model="gpt-4", tools=[UpperTool()]), input=[{"role": "user", "content": "a"}],
+                    checkpointer=checkpointer, thread_id="batch")
+
+    await BatchApiRunner(client=api.client, poll_interval=0).run([thread])
+    await checkpointer.flush()
+
+    state = checkpointer.restore("batch")
+    assert state.input == thread.input
+    assert state.turn_count == 2
+    assert "call_1" in state.tool_outputs
+    checkpointer.close()
@@ -0,0 +1,110 @@
+"""
+Tests for BatchRunner with a mocked OpenAI client.
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import MagicMock
+
+from fast_agents import Agent, BatchRunner
+from tests.conftest import MockResponse
+
+
+class _Text:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Message:
+    def __init__(self, text):
+        self.type = "message"
+        self.content = [_Text(text)]
+
+
+def _client(running, peak, fail_on=None):
+    async def create(**params):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+
+        text = params["input"][-1]["content"][0]["text"]
+        if text == fail_on:
+            raise RuntimeError("boom")
+        return MockResponse([_Message(text.upper())])
+
+    client = MagicMock()
+    client.responses.create = create
+    return client
+
+
+@pytest.mark.asyncio
+async def test_bounded_concurrency_and_results():
+    running, peak = [0], [0]
+    runner = BatchRunner(Agent(model="gpt-4"), max_concurrency=3, client=_client(running, peak))
+
+    results = [result async for result in runner.run(f"item {i}" for i in range(10))]
+
+    assert peak[0] == 3
+    assert sorted(result.output for result in results) == sorted(f"ITEM {i}" for i in range(10))
+    assert runner.stats.completed == 10
+    assert runner.stats.throughput > 0
+
+
+@pytest.mark.asyncio
+async def test_failures_are_reported_not_raised():
+    running, peak = [0], [0]
+    runner = BatchRunner(Agent(model="gpt-4"), client=_client(running, peak, fail_on="b"))
+
+    results = {result.id: result async for result in runner.run([{"id": "a", "input": "a"}, {"id": "b", "input": "b"}])}
+
+    assert results["a"].output == "A"
+    assert "boom" in results["b"].error
+    assert (runner.stats.completed, runner.stats.failed) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_jsonl_checkpoint_resumes(tmp_path):
+    source = tmp_path / "input.jsonl"
+    source.write_text("".join(json.dumps({"id": f"id-{i}", "input": f"x{i}"}) + "\n" for i in range(4)))
+    checkpoint = tmp_path / "results.jsonl"
+    checkpoint.write_text(json.dumps({"id": "id-0", "output": "X0"}) + "\n" + json.dumps({"id": "id-1", "error": "failed"}) + "\n")
+
+    running, peak = [0], [0]
+    runner = BatchRunner(Agent(model="gpt-4"), client=_client(running, peak), checkpoint_path=checkpoint)
+
+    results = [result async for result in runner.run_jsonl(source)]
+
+    assert sorted(result.id for result in results) == ["id-1", "id-2", "id-3"]
+    assert runner.stats.skipped == 1
+    assert runner.completed_ids() == {"id-0", "id-1", "id-2", "id-3"}
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_with_torn_last_line(tmp_path):
+    checkpoint = tmp_path / "results.jsonl"
+    checkpoint.write_text(json.dumps({"id": "a", "output": "A"}) + "\n" + '{"id": "b", "out')
+
+    running, peak = [0], [0]
+    runner = BatchRunner(Agent(model="gpt-4"), client=_client(running, peak), checkpoint_path=checkpoint)
+
+    results = [result async for result in runner.run([{"id": "a", "input": "a"}, {"id": "b", "input": "b"}])]
+
+    assert [result.id for result in results] == ["b"]
+    assert runner.completed_ids() == {"a", "b"}
+
+
+@pytest.mark.asyncio
+async def test_invalid_items_fail_alone():
+    running, peak = [0], [0]
+    runner = BatchRunner(Agent(model="gpt-4"), client=_client(running, peak))
+    message = {"role": "user", "content": [{"type": "input_text", "text": "c"}]}
+
+    results = {result.id: result async for result in runner.run([{"id": "a"}, {"id": "b", "input": message}, {"id": "c", "input": 3}])}
+
+    assert "Invalid item" in results["a"].error
+    assert results["b"].output == "C"
+    assert "Invalid item" in results["c"].error
+    assert (runner.stats.completed, runner.stats.failed) == (1, 2)
@@ -0,0 +1,164 @@
+"""
+Tests for thread checkpointing and resume.
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from pydantic import BaseModel
+
+from fast_agents import Agent, Thread, Tool, ToolResponse, Checkpointer, FileCheckpointStore, SqliteCheckpointStore
+from tests.conftest import MockResponse, MockResponseOutputItem
+
+
+class CountSchema(BaseModel):
+    n: int
+
+
+def _agent(calls, stall=None):
+    class CountTool(Tool):
+        name = "count"
+        description = "Count"
+        schema = CountSchema
+
+        async def handle(self, n: int, **kwargs) -> ToolResponse:
+            if n == stall:
+                await asyncio.sleep(10)
+            calls.append(n)
+            return ToolResponse(output={"n": n})
+
+    return Agent(name="counter", model="gpt-4", tools=[CountTool()])
+
+
+def _tool_calls_response(*ns):
+    return MockResponse([
+        MockResponseOutputItem(item_type="function_call", name="count", arguments=json.dumps({"n": n}), call_id=f"call_{n}")
+        for n in ns
+    ])
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def checkpointer(request, tmp_path):
+    store = FileCheckpointStore(tmp_path) if request.param == "file" else SqliteCheckpointStore(tmp_path / "checkpoints.db")
+    checkpointer = Checkpointer(store)
+    yield checkpointer
+    checkpointer.close()
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_restores_completed_thread(checkpointer):
+    calls = []
+    thread = Thread(agent=_agent(calls), input=[{"role": "user", "content": "go"}], checkpointer=checkpointer, thread_id="t1")
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(side_effect=[
+        _tool_calls_response(1),
+        MockResponse([MockResponseOutputItem(item_type="text", content="done")]),
+    ])
+
+    await thread.run_to_completion()
+    await checkpointer.flush()
+
+    state = checkpointer.restore("t1")
+    assert state.agent_name == "counter"
+    assert state.turn_count == 2
+    assert len(state.input) == len(thread.input)
+    assert state.tool_outputs["call_1"][0]["type"] == "function_call_output"
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_tool_calls(checkpointer):
+    calls = []
+    thread = Thread(agent=_agent(calls, stall=2), input=[{"role": "user", "content": "go"}], checkpointer=checkpointer, thread_id="t2")
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(return_value=_tool_calls_response(1, 2))
+
+    # Worker dies while tool 2 is still running
+    task = asyncio.create_task(thread.run_to_completion())
+    while calls != [1]:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await checkpointer.flush()
+
+    calls.clear()
+    resumed = Thread.resume("t2", checkpointer, _agent(calls))
+    resumed.client = MagicMock()
+    resumed.client.responses.create = AsyncMock(return_value=MockResponse([MockResponseOutputItem(item_type="text", content="done")]))
+
+    await resumed.run_to_completion()
+
+    assert calls == [2]
+    outputs = [item["call_id"] for item in resumed.input if isinstance(item, dict) and item.get("type") == "function_call_output"]
+    assert sorted(outputs) == ["call_1", "call_2"]
+    assert resumed.turn_count == 2
+
+
+def test_resume_unknown_thread(checkpointer):
+    from fast_agents.exceptions import CheckpointNotFoundException
+
+    with pytest.raises(CheckpointNotFoundException):
+        Thread.resume("missing", checkpointer, Agent())
+
+
+def test_file_store_rejects_ids_outside_its_directory(tmp_path):
+    checkpointer = Checkpointer(FileCheckpointStore(tmp_path / "checkpoints"))
+
+    with pytest.raises(ValueError):
+        Thread.resume("../escaped", checkpointer, _agent([]))
+    checkpointer.close()
+
+
+def test_invalid_thread_ids_are_rejected_before_queueing(tmp_path):
+    checkpointer = Checkpointer(FileCheckpointStore(tmp_path))
+
+    with pytest.raises(ValueError):
+        checkpointer.write("bad id", {"type": "items", "start": 0, "items": []})
+    with pytest.raises(ValueError):
+        Thread(agent=_agent([]), input=[], checkpointer=checkpointer, thread_id="bad id")
+    checkpointer.close()
+
+
+class FailingStore(FileCheckpointStore):
+    """Fails writes to the `broken` log `failures` times."""
+
+    def __init__(self, directory, failures):
+        super().__init__(directory)
+        self.failures = failures
+
+    def append_many(self, records):
+        if self.failures and any(thread_id == "broken" for thread_id, _ in records):
+            self.failures -= 1
+            raise OSError("disk full")
+        super().append_many(records)
+
+
+@pytest.mark.asyncio
+async def test_failing_log_does_not_lose_other_threads(tmp_path):
+    checkpointer = Checkpointer(FailingStore(tmp_path, failures=2))
+    record = {"type": "items", "start": 0, "items": [{"role": "user", "content": "hi"}]}
+    checkpointer.write("broken", record)
+    checkpointer.write("good", record)
+
+    with pytest.raises(OSError):
+        await checkpointer.flush()
+    assert checkpointer.restore("good").input == record["items"]
+    assert checkpointer.restore("broken") is None
+
+    await checkpointer.flush()
+    assert checkpointer.restore("broken").input == record["items"]
+    checkpointer.close()
+
+
+@pytest.mark.asyncio
+async def test_resume_requires_the_checkpointed_agent(checkpointer):
+    from fast_agents.exceptions import ConfigurationException
+
+    thread = Thread(agent=_agent([]), input=[{"role": "user", "content": "go"}], checkpointer=checkpointer, thread_id="t3")
+    thread.checkpoint()
+    await checkpointer.flush()
+
+    with pytest.raises(ConfigurationException, match="counter"):
+        Thread.resume("t3", checkpointer, Agent(name="other"))
@@ -0,0 +1,51 @@
+"""
+Tests for the shared client provider.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fast_agents import Agent, Thread, ClientProvider
+from tests.conftest import MockResponse, MockResponseOutputItem
+
+
+@pytest.mark.asyncio
+async def test_provider_shares_one_client_per_loop():
+    provider = ClientProvider(max_connections=10, http2=False, api_key="sk-test")
+
+    client = provider.get()
+
+    assert provider.get() is client
+    await provider.aclose()
+    assert provider.get() is not client
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_threads_use_provider_client():
+    provider = ClientProvider(http2=False)
+    agent = Agent(name="test_agent", instructions="i", model="gpt-4")
+
+    with patch("fast_agents.client_provider.AsyncOpenAI") as mock_openai_class:
+        mock_client = MagicMock()
+        mock_client.responses.create = AsyncMock(return_value=MockResponse([MockResponseOutputItem(content="hi")]))
+        mock_openai_class.return_value = mock_client
+
+        threads = [Thread(agent=agent, client_provider=provider) for _ in range(3)]
+        for thread in threads:
+            await thread.run_to_completion()
+
+    assert mock_openai_class.call_count == 1
+    assert all(thread.client is mock_client for thread in threads)
+
+
+@pytest.mark.asyncio
+async def test_thread_uses_injected_client():
+    agent = Agent(name="test_agent", instructions="i", model="gpt-4")
+    client = MagicMock()
+    client.responses.create = AsyncMock(return_value=MockResponse([MockResponseOutputItem(content="hi")]))
+
+    output = await Thread(agent=agent, client=client).run_to_completion()
+
+    assert output.content == "hi"
+    client.responses.create.assert_called_once()
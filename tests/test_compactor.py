@@ -0,0 +1,113 @@
+"""
+Tests for history compaction.
+"""
+
+import asyncio
+
+import pytest
+
+from fast_agents import History, LocalCompactor
+from fast_agents.compactor import SUMMARY_PREFIX, Compactor
+from tests.conftest import make_items, make_thread, mock_client, text_response
+
+pytestmark = pytest.mark.usefixtures("char_tokens")
+
+
+class CountingCompactor(LocalCompactor):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    async def summarize(self, items, thread, max_tokens):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return await super().summarize(items, thread, max_tokens)
+
+
+@pytest.mark.asyncio
+async def test_history_under_threshold_is_untouched():
+    thread = make_thread(input=make_items(3), compactor=LocalCompactor(max_tokens=10_000))
+
+    assert not await thread.compactor.compact(thread)
+    assert thread.input == make_items(3)
+
+
+@pytest.mark.asyncio
+async def test_old_items_are_replaced_by_summary():
+    item_tokens = len(History(make_items(1)).serialized(0))
+    thread = make_thread(input=make_items(10), compactor=LocalCompactor(max_tokens=item_tokens * 6, keep_tokens=item_tokens * 3))
+
+    assert await thread.compactor.compact(thread)
+
+    assert len(thread.input) == 4
+    assert thread.input[0]["content"].startswith(SUMMARY_PREFIX)
+    assert thread.input[0]["content"].startswith(SUMMARY_PREFIX + "user: message 000")
+    assert thread.input.token_count() <= item_tokens * 6
+    assert thread.input[1:] == make_items(3, 7)
+
+
+def test_cut_keeps_function_calls_with_outputs():
+    history = History([
+        *make_items(2),
+        {"type": "reasoning", "id": "rs_1", "summary": []},
+        {"type": "function_call", "call_id": "a", "name": "search", "arguments": "{}"},
+        {"type": "function_call", "call_id": "b", "name": "search", "arguments": "{}"},
+        {"type": "function_call_output", "call_id": "a", "output": "1"},
+        {"type": "function_call_output", "call_id": "b", "output": "2"},
+    ])
+
+    assert Compactor.cut_index(history, 6) == 2
+    assert Compactor.cut_index(history, 1) == 1
+
+
+@pytest.mark.asyncio
+async def test_summaries_are_cached():
+    item_tokens = len(History(make_items(1)).serialized(0))
+    compactor = CountingCompactor(max_tokens=item_tokens * 6, keep_tokens=item_tokens * 3)
+    first, second = make_thread(input=make_items(10), compactor=compactor), make_thread(input=make_items(10), compactor=compactor)
+
+    await asyncio.gather(compactor.compact(first), compactor.compact(second))
+
+    assert compactor.calls == 1
+    assert first.input == second.input
+
+
+@pytest.mark.asyncio
+async def test_thread_compacts_before_request():
+    items = [{"role": "user", "content": f"message {i:03} " + "x" * 200} for i in range(10)]
+    item_tokens = len(History(items[:1]).serialized(0))
+    thread = make_thread(input=items, compactor=LocalCompactor(max_line_chars=20), max_input_tokens=item_tokens * 6)
+    thread.client = mock_client(text_response("hi"))
+
+    await thread.run_to_completion()
+
+    sent = thread.client.responses.create.call_args.kwargs["input"]
+    assert sent[0]["content"].startswith(SUMMARY_PREFIX)
+    assert sent[1:] == items[7:]
+    assert thread.compactor.compactions == 1
+
+
+@pytest.mark.asyncio
+async def test_summary_fits_and_stays_in_sent_input():
+    items = [{"role": "user", "content": f"message {i:03} " + "x" * 150} for i in range(40)]
+    thread = make_thread(input=items, compactor=LocalCompactor(), max_input_tokens=2000)
+    thread.client = mock_client(text_response("hi"))
+
+    await thread.run_to_completion()
+
+    sent = thread.client.responses.create.call_args.kwargs["input"]
+    assert sent[0]["content"].startswith(SUMMARY_PREFIX)
+    assert thread.input.token_count(0, len(thread.input) - 1) <= 2000
+    assert thread.compactor.compactions == 1
+
+
+@pytest.mark.asyncio
+async def test_summary_is_pinned_when_window_dropsmake_items():
+    item_tokens = len(History(make_items(1)).serialized(0))
+    thread = make_thread(input=[Compactor.summary_item("earlier"), *make_items(10)], compactor=LocalCompactor(max_tokens=10_000), max_input_tokens=item_tokens * 3)
+
+    run_input = await thread.get_run_input()
+
+    assert run_input[0] == Compactor.summary_item("earlier")
+    assert run_input[1:] == thread.input[thread._window_start:]
+    assert 1 < thread._window_start < len(thread.input)
@@ -0,0 +1,102 @@
+"""
+Tests for forking threads.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from fast_agents import Agent, History, Thread
+from tests.conftest import make_items, make_thread, mock_client, text_response
+
+
+def test_history_fork_shares_full_segments():
+    parent = History(make_items(10), segment_size=4)
+    child = parent.fork()
+
+    child.append({"role": "user", "content": "child"})
+    parent.append({"role": "user", "content": "parent"})
+
+    assert child._segments[0] is parent._segments[0]
+    assert child._segments[1] is parent._segments[1]
+    assert child._segments[-1] is not parent._segments[-1]
+    assert child == make_items(10) + [{"role": "user", "content": "child"}]
+    assert parent == make_items(10) + [{"role": "user", "content": "parent"}]
+
+
+def test_history_fork_rewrite_leaves_parent_intact():
+    parent = History(make_items(10), segment_size=4)
+    child = parent.fork()
+
+    del child[1]
+
+    assert parent == make_items(10)
+    assert child == make_items(1) + make_items(8, 2)
+
+
+def test_thread_fork_copies_state():
+    thread = Thread(agent=Agent(model="gpt-4"), input=make_items(3))
+    children = thread.fork(3)
+
+    children[0].input.append({"role": "user", "content": "only in child"})
+
+    assert len(children) == 3
+    assert len({child.thread_id for child in children} | {thread.thread_id}) == 4
+    assert thread.input == make_items(3)
+    assert children[1].input == make_items(3)
+
+
+@pytest.mark.asyncio
+async def test_fork_and_run_merges_selected_child():
+    thread = Thread(agent=Agent(model="gpt-4"), input=make_items(1))
+    thread.client = mock_client(text_response("first"), text_response("second"))
+
+    output = await thread.fork_and_run(2, select=lambda candidates: 1)
+
+    assert output.content == "second"
+    assert len(thread.input) == 2
+    assert thread.input[-1]["content"] == "second"
+    assert thread.turn_count == 1
+
+
+@pytest.mark.asyncio
+async def test_fork_and_run_skips_failed_children():
+    thread = make_thread(input=make_items(1), responses=[RuntimeError("boom"), text_response("ok")])
+
+    async def select(candidates):
+        return 0
+
+    output = await thread.fork_and_run(2, select=select)
+
+    assert output.content == "ok"
+
+
+@pytest.mark.asyncio
+async def test_fork_and_run_raises_when_all_children_fail():
+    thread = Thread(agent=Agent(model="gpt-4"), input=make_items(1))
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(side_effect=RuntimeError("boom"))
+
+    with pytest.raises(RuntimeError):
+        await thread.fork_and_run(2)
+    assert thread.input == make_items(1)
+
+
+def test_merge_refuses_a_parent_changed_since_fork():
+    thread = Thread(agent=Agent(model="gpt-4"), input=make_items(2))
+    child = thread.fork(1)[0]
+    child.input.append({"role": "user", "content": "child"})
+    thread.input.append({"role": "user", "content": "parent"})
+
+    with pytest.raises(RuntimeError):
+        thread.merge(child)
+    assert thread.input == make_items(2) + [{"role": "user", "content": "parent"}]
+
+
+def test_closing_a_fork_keeps_shared_spill_readable():
+    parent = History(make_items(20), segment_size=4, spill_after_segments=1)
+    child = parent.fork()
+
+    child.close()
+
+    assert parent == make_items(20)
+    parent.close()
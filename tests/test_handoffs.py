@@ -41,7 +41,7 @@ async def test_handoff_pipeline_switches_agent():
     ])
 
     # Patch the OpenAI client used inside Thread
-    with patch("fast_agents.thread.AsyncOpenAI") as mock_openai_class:
+    with patch("fast_agents.client_provider.AsyncOpenAI") as mock_openai_class:
         mock_client = MagicMock()
         mock_second_response = MockResponse([
             MockResponseOutputItem(item_type="text", content="done")
@@ -0,0 +1,128 @@
+"""
+Tests for hedged requests.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock
+
+from fast_agents import Agent, Thread, HedgePolicy
+from tests.conftest import MockResponse, MockResponseOutputItem
+
+
+def test_delay_follows_latency_percentile():
+    policy = HedgePolicy(percentile=0.9, initial_delay=3.0, min_samples=10)
+    assert policy.delay() == 3.0
+
+    for latency in range(1, 11):
+        policy.record(latency / 10)
+
+    assert policy.delay() == pytest.approx(0.9)
+
+
+@pytest.mark.asyncio
+async def test_fast_request_is_not_hedged():
+    policy = HedgePolicy(initial_delay=0.5)
+    sent = []
+
+    async def send(params):
+        sent.append(params["model"])
+        return "ok"
+
+    assert await policy.run(send, {"model": "a"}) == "ok"
+    assert sent == ["a"]
+    assert (policy.requests, policy.fired, policy.won) == (1, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_stalled_request_is_hedged_and_cancelled():
+    policy = HedgePolicy(initial_delay=0.05, alternate_model="b")
+    cancelled = []
+
+    async def send(params):
+        if params["model"] == "a":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(params["model"])
+                raise
+        return params["model"]
+
+    assert await policy.run(send, {"model": "a"}) == "b"
+    await asyncio.sleep(0)
+
+    assert cancelled == ["a"]
+    assert (policy.fired, policy.won) == (1, 1)
+    assert policy.win_rate == 1.0
+
+
+@pytest.mark.asyncio
+async def test_hedged_latency_counts_from_original_request():
+    policy = HedgePolicy(initial_delay=0.05, alternate_model="b")
+
+    async def send(params):
+        await asyncio.sleep(5 if params["model"] == "a" else 0)
+        return params["model"]
+
+    await policy.run(send, {"model": "a"})
+
+    assert list(policy.latencies) == [pytest.approx(0.05, abs=0.04)]
+    assert policy.latencies[0] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_losers_finishing_during_cancellation_are_released():
+    policy = HedgePolicy(initial_delay=0.01, alternate_model="b")
+    released = []
+
+    async def send(params):
+        if params["model"] == "a":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                return "a"   # the stream was opened before the cancellation arrived
+        return "b"
+
+    async def release(result):
+        released.append(result)
+
+    assert await policy.run(send, {"model": "a"}, release=release) == "b"
+    assert released == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_original():
+    policy = HedgePolicy(initial_delay=0.01)
+    calls = 0
+
+    async def send(params):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("hedge failed")
+        await asyncio.sleep(0.05)
+        return "original"
+
+    assert await policy.run(send, {"model": "a"}) == "original"
+    assert (policy.fired, policy.won) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_thread_hedges_slow_requests():
+    agent = Agent(name="test_agent", instructions="i", model="gpt-4")
+    policy = HedgePolicy(initial_delay=0.05, alternate_model="gpt-4o-mini")
+    thread = Thread(agent=agent, input=[{"role": "user", "content": "hi"}], hedge_policy=policy)
+
+    async def create(**params):
+        if params["model"] == "gpt-4":
+            await asyncio.sleep(5)
+        return MockResponse([MockResponseOutputItem(item_type="text", content=params["model"])])
+
+    thread.client = MagicMock()
+    thread.client.responses.create = create
+
+    outputs = [output async for output in thread.run()]
+
+    assert outputs[0].content == "gpt-4o-mini"
+    assert policy.won == 1
@@ -3,12 +3,19 @@ Tests for helper functions.
 """
 
 import pytest
-from fast_agents.helpers import format_parameters, num_tokens_from_string, gather_contexts
+from fast_agents.helpers import format_parameters, num_tokens_from_string, gather_contexts, \
+    count_tokens_many, get_encoding, encoding_name_for_model, save_schema_cache, load_schema_cache
+from fast_agents.helpers.input_filters import filter_input, filter_status, filter_ids, filter_reasoning, filter_files, \
+    filter_function_calls
 from fast_agents import LlmContext
-from pydantic import BaseModel
+from pydantic import BaseModel, create_model
 from typing import Optional
 
 
+class PersistedSchema(BaseModel):
+    value: str
+
+
 class TestHelpers:
     """Test cases for helper functions."""
 
@@ -43,6 +50,22 @@ class TestHelpers:
         assert default_tokens == specific_tokens
         assert isinstance(default_tokens, int)
 
+    def test_count_tokens_many(self):
+        """Test batch token counting matches single-string counting."""
+
+        texts = ["Hello world", "", "This is a longer piece of text with more tokens."]
+
+        assert count_tokens_many(texts) == [num_tokens_from_string(text) for text in texts]
+        assert count_tokens_many([]) == []
+
+    def test_encoding_registry(self):
+        """Test encodings are loaded once and resolved from model names."""
+
+        assert get_encoding("o200k_base") is get_encoding("o200k_base")
+        assert encoding_name_for_model("gpt-4o") == "o200k_base"
+        assert encoding_name_for_model("some-unknown-model") == "o200k_base"
+        assert encoding_name_for_model(None) == "o200k_base"
+
     def test_format_parameters(self):
         """Test parameter formatting for tool schemas."""
         
@@ -84,6 +107,57 @@ class TestHelpers:
         assert "nested_field" in formatted["properties"]
         assert "list_field" in formatted["properties"]
 
+    def test_format_parameters_is_cached_and_returns_copies(self, monkeypatch):
+        """Test schemas are generated once per model and callers can mutate their copy."""
+        from fast_agents.helpers import schema_helper
+
+        class CachedSchema(BaseModel):
+            name: str
+            tags: list[str] = []
+
+        calls = []
+        build = schema_helper._build_parameters
+        monkeypatch.setattr(schema_helper, "_build_parameters", lambda s: calls.append(s) or build(s))
+
+        formatted = format_parameters(CachedSchema)
+        formatted["required"].append("tags")
+        formatted["additionalProperties"] = True
+
+        assert format_parameters(CachedSchema)["required"] == ["name"]
+        assert format_parameters(CachedSchema)["additionalProperties"] is False
+        assert calls == [CachedSchema]
+
+    def test_schema_cache_roundtrip(self, tmp_path, monkeypatch):
+        """Test persisted schemas are used instead of regenerating them."""
+        from fast_agents.helpers import schema_helper
+
+        format_parameters(PersistedSchema)
+        path = tmp_path / "schemas.json"
+        assert save_schema_cache(path) >= 1
+
+        schema_helper.clear_schema_cache()
+        assert load_schema_cache(path) >= 1
+        monkeypatch.setattr(schema_helper, "_build_parameters", None)
+        assert format_parameters(PersistedSchema)["required"] == ["value"]
+
+    def test_schema_cache_ignores_changed_models(self, tmp_path):
+        """Test a persisted schema is not used once its model changed."""
+        from fast_agents.helpers import schema_helper
+
+        format_parameters(PersistedSchema)
+        path = tmp_path / "schemas.json"
+        save_schema_cache(path)
+
+        # Same qualified name as PersistedSchema, as after editing the module
+        unchanged = create_model("PersistedSchema", __module__=PersistedSchema.__module__, value=(str, ...))
+        changed = create_model("PersistedSchema", __module__=PersistedSchema.__module__, value=(int, ...))
+        assert schema_helper.schema_fingerprint(unchanged) == schema_helper.schema_fingerprint(PersistedSchema)
+
+        schema_helper.clear_schema_cache()
+        load_schema_cache(path)
+
+        assert format_parameters(changed)["properties"]["value"]["type"] == "integer"
+
     @pytest.mark.asyncio
     async def test_gather_contexts(self):
         """Test LLM context gathering."""
@@ -157,4 +231,170 @@ class TestHelpers:
                 return ""
 
         w = WithProperty()
-        assert w.name == "Prop Name"
\ No newline at end of file
+        assert w.name == "Prop Name"
+
+class TestInputFilters:
+    """Test cases for fused input filtering."""
+
+    @staticmethod
+    def history():
+        return [
+            {"role": "user", "type": "message", "id": "m1", "status": "completed", "content": [
+                {"type": "input_text", "text": "hi"},
+                {"type": "input_file", "file_id": "f1"},
+            ]},
+            {"role": "user", "type": "message", "content": [{"type": "input_file", "file_id": "f2"}]},
+            {"type": "reasoning", "id": "r1", "summary": []},
+            {"type": "function_call", "id": "fc1", "call_id": "c1", "name": "echo", "arguments": "{}", "status": "completed"},
+            {"type": "function_call_output", "call_id": "c1", "output": "{}"},
+            {"role": "assistant", "content": "done", "status": "completed"},
+        ]
+
+    def test_fused_filters_match_chained_filters(self):
+        filters = [filter_status, filter_ids, filter_reasoning, filter_files, filter_function_calls]
+
+        chained = self.history()
+        for f in filters:
+            chained = f(chained)
+
+        assert filter_input(self.history(), filters) == chained
+
+    def test_fused_filters_with_custom_filter(self):
+        drop_assistant = lambda items: [i for i in items if i.get("role") != "assistant"]
+
+        result = filter_input(self.history(), [filter_status, drop_assistant, filter_ids])
+
+        assert all("status" not in i and "id" not in i for i in result)
+        assert all(i.get("role") != "assistant" for i in result)
+
+    def test_filters_do_not_mutate_input(self):
+        history = self.history()
+
+        filter_input(history, [filter_status, filter_ids])
+
+        assert history == self.history()
+
+
+class TestLlmContextCache:
+    """Test cases for cached LlmContext content."""
+
+    @staticmethod
+    def make_context(ttl, swr=False):
+        import asyncio
+
+        class CountingContext(LlmContext):
+            calls = 0
+
+            async def get_content(self) -> str:
+                CountingContext.calls += 1
+                await asyncio.sleep(0.01)
+                return f"v{CountingContext.calls}"
+
+            def cache_key(self, context):
+                return context.user_id if context else None
+
+        CountingContext.ttl = ttl
+        CountingContext.stale_while_revalidate = swr
+        return CountingContext
+
+    @pytest.mark.asyncio
+    async def test_single_flight_and_ttl(self):
+        import asyncio
+        from fast_agents.helpers.llm_context_helper import LlmContextCache
+
+        now = [0.0]
+        cache = LlmContextCache(clock=lambda: now[0])
+        context_cls = self.make_context(ttl=10)
+
+        results = await asyncio.gather(*[gather_contexts([context_cls()], cache=cache) for _ in range(5)])
+        assert context_cls.calls == 1
+        assert set(results) == {"**CountingContext:**\n```v1```"}
+
+        now[0] = 11
+        assert "v2" in await gather_contexts([context_cls()], cache=cache)
+
+    @pytest.mark.asyncio
+    async def test_cache_key_from_thread_context(self):
+        from fast_agents.helpers.llm_context_helper import LlmContextCache
+
+        class User(BaseModel):
+            user_id: int
+
+        cache = LlmContextCache()
+        context_cls = self.make_context(ttl=60)
+
+        await gather_contexts([context_cls()], User(user_id=1), cache=cache)
+        await gather_contexts([context_cls()], User(user_id=1), cache=cache)
+        await gather_contexts([context_cls()], User(user_id=2), cache=cache)
+
+        assert context_cls.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        import asyncio
+        from fast_agents.helpers.llm_context_helper import LlmContextCache
+
+        now = [0.0]
+        cache = LlmContextCache(clock=lambda: now[0])
+        context_cls = self.make_context(ttl=10, swr=True)
+
+        await gather_contexts([context_cls()], cache=cache)
+        now[0] = 20
+
+        assert "v1" in await gather_contexts([context_cls()], cache=cache)
+        await asyncio.sleep(0.05)
+        assert "v2" in await gather_contexts([context_cls()], cache=cache)
+
+    @pytest.mark.asyncio
+    async def test_lru_bound(self):
+        from fast_agents.helpers.llm_context_helper import LlmContextCache
+
+        class User(BaseModel):
+            user_id: int
+
+        cache = LlmContextCache(maxsize=2)
+        context_cls = self.make_context(ttl=60)
+
+        for user_id in (1, 2, 3, 1):
+            await gather_contexts([context_cls()], User(user_id=user_id), cache=cache)
+
+        assert context_cls.calls == 4
+
+    @pytest.mark.asyncio
+    async def test_cache_does_not_keep_contexts_alive(self):
+        import gc
+        import weakref
+        from fast_agents.helpers.llm_context_helper import LlmContextCache
+
+        class InstanceContext(LlmContext):
+            ttl = 60
+
+            async def get_content(self) -> str:
+                return "content"
+
+        cache = LlmContextCache()
+        llm_context = InstanceContext()
+        await gather_contexts([llm_context], cache=cache)
+        alive = weakref.ref(llm_context)
+
+        del llm_context
+        gc.collect()
+
+        assert alive() is None
+
+    @pytest.mark.asyncio
+    async def test_clear_drops_inflight_refreshes(self):
+        import asyncio
+        from fast_agents.helpers.llm_context_helper import LlmContextCache
+
+        cache = LlmContextCache()
+        context_cls = self.make_context(ttl=60)
+
+        refresh = asyncio.create_task(cache.get(context_cls()))
+        await asyncio.sleep(0)
+        assert cache._inflight
+        cache.clear()
+        assert not cache._inflight
+        assert await refresh == "**CountingContext:**\n```v1```"
+
+        assert "v2" in await gather_contexts([context_cls()], cache=cache)
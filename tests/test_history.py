@@ -0,0 +1,134 @@
+"""
+Tests for the segmented History container.
+"""
+
+import pytest
+
+from fast_agents import Agent, History, Thread
+from fast_agents.helpers.input_filters import filter_input, filter_function_calls
+from tests.conftest import make_items, make_thread, text_response
+
+
+def test_behaves_like_a_list():
+    history, expected = History(make_items(10), segment_size=3), make_items(10)
+
+    history.insert(2, {"role": "user", "content": "inserted"})
+    expected.insert(2, {"role": "user", "content": "inserted"})
+    del history[4:7]
+    del expected[4:7]
+    history[-1] = {"role": "user", "content": "replaced"}
+    expected[-1] = {"role": "user", "content": "replaced"}
+    history.extend(make_items(5, 100))
+    expected.extend(make_items(5, 100))
+
+    assert history == expected
+    assert history[3:9] == expected[3:9]
+    assert history[::2] == expected[::2]
+    assert history.pop() == expected.pop()
+
+
+def test_items_are_normalized():
+    history = History([{"id": "msg_1", "status": "completed", "type": "message", "role": "assistant", "content": []}])
+
+    assert history[0] == {"type": "message", "role": "assistant", "content": []}
+
+
+def test_appending_keeps_generation_rewriting_bumps_it():
+    history = History(make_items(3))
+    mark = history.mark()
+
+    history.append({"role": "user", "content": "new"})
+    assert history.appended_since(mark)
+
+    history[0] = {"role": "user", "content": "changed"}
+    assert not history.appended_since(mark)
+
+
+def test_token_counts_are_cached(char_tokens):
+    history = History(make_items(4))
+
+    total = history.token_count()
+    history.append({"role": "user", "content": "x"})
+    history.token_count()
+
+    assert len(char_tokens) == 5
+    assert total == sum(len(history.serialized(i)) for i in range(4))
+    assert history.start_index(len(history.serialized(4))) == 4
+
+
+def test_spilled_segments_are_read_back():
+    history = History(make_items(20), segment_size=4, spill_after_segments=1)
+    try:
+        assert sum(segment.items is None for segment in history._segments) == 3
+        assert history == make_items(20)
+        assert history[1] == {"role": "user", "content": "message 001"}
+
+        del history[1]
+        assert history == make_items(1) + make_items(18, 2)
+    finally:
+        history.close()
+
+
+def test_filters_accept_history():
+    history = History([{"type": "function_call", "call_id": "c", "name": "n", "arguments": "{}"}, *make_items(2)])
+
+    assert filter_input(history, [filter_function_calls]) == make_items(2)
+
+
+@pytest.mark.asyncio
+async def test_thread_keeps_history_apart_from_run_context():
+    history = History(make_items(1))
+    thread = make_thread(input=history, responses=[text_response("hi")])
+
+    await thread.run_to_completion()
+
+    assert len(thread.input) == 2
+    assert len(history) == 1
+
+    run_context = thread.create_run_context(thread.input[:])
+    run_context.input.clear()
+    assert len(thread.input) == 2
+
+
+def test_assigning_a_list_creates_a_history():
+    thread = Thread(agent=Agent(model="gpt-4"), input=History(segment_size=4, spill_after_segments=1))
+    thread.input = make_items(2)
+
+    assert isinstance(thread.input, History)
+    assert thread.input == make_items(2)
+    assert thread.input.settings()["spill_after_segments"] == 1
+
+
+def test_history_behaves_like_a_list_where_callers_expect_one():
+    import json
+
+    history = History(make_items(2))
+
+    assert json.dumps(history.to_list()) == json.dumps(make_items(2))
+    assert history.copy() == make_items(2) and isinstance(history.copy(), list)
+    assert history + make_items(1, 2) == make_items(3)
+    assert make_items(1, 2) + history == make_items(1, 2) + make_items(2)
+
+
+def test_appending_does_not_wait_for_token_counting(monkeypatch):
+    import threading
+
+    counting, release = threading.Event(), threading.Event()
+
+    def slow_count(strings, encoding_name=None):
+        counting.set()
+        assert release.wait(5)
+        return [len(s) for s in strings]
+
+    monkeypatch.setattr("fast_agents.history.count_tokens_many", slow_count)
+    history = History(make_items(3), segment_size=2)
+    worker = threading.Thread(target=history.count_tokens)
+    worker.start()
+    assert counting.wait(5)
+
+    history.extend(make_items(3, 3))   # would block if the worker held the lock while tokenizing
+    release.set()
+    worker.join(5)
+
+    monkeypatch.setattr("fast_agents.history.count_tokens_many", lambda strings, encoding_name=None: [len(s) for s in strings])
+    assert history.token_count() == sum(len(history.serialized(i)) for i in range(6))
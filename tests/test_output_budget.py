@@ -0,0 +1,138 @@
+"""
+Tests for tool output budgets.
+"""
+
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from fast_agents import Agent, LocalBlobStore, OutputBudget, Tool, ToolResponse
+from fast_agents.output_budget import READ_TOOL_NAME
+from tests.conftest import MockResponse, MockResponseOutputItem, make_thread, text_response
+
+pytestmark = pytest.mark.usefixtures("char_tokens")
+
+
+class SearchSchema(BaseModel):
+    query: str
+
+
+class SearchTool(Tool):
+    name = "search"
+    description = "Search"
+    schema = SearchSchema
+    max_output_tokens = 50
+
+    async def handle(self, query: str, **kwargs) -> ToolResponse:
+        return ToolResponse(output={"results": "r" * 500})
+
+
+class UnlimitedSearchTool(SearchTool):
+    name = "unlimited_search"
+    max_output_tokens = None
+
+
+def _call_response(name="search"):
+    return MockResponse([MockResponseOutputItem(item_type="function_call", name=name, arguments='{"query": "q"}', call_id="call_1")])
+
+
+def _thread(responses, tool=SearchTool, **kwargs):
+    return make_thread(agent=Agent(model="gpt-4", tools=[tool()]), responses=responses, **kwargs)
+
+
+def _tool_output(thread, call_id="call_1"):
+    return next(item["output"] for item in thread.input if item.get("type") == "function_call_output" and item["call_id"] == call_id)
+
+
+@pytest.mark.asyncio
+async def test_tool_limit_truncates_output():
+    thread = _thread([_call_response(), text_response()])
+
+    await thread.run_to_completion()
+
+    output = _tool_output(thread)
+    assert output.startswith(ToolResponse(output={"results": "r" * 500}).output_str[:50])
+    assert "truncated" in output
+    assert len(output) < 120
+
+
+@pytest.mark.asyncio
+async def test_outputs_within_budget_are_unchanged():
+    thread = _thread([_call_response("unlimited_search"), text_response()], tool=UnlimitedSearchTool)
+
+    await thread.run_to_completion()
+
+    assert _tool_output(thread) == ToolResponse(output={"results": "r" * 500}).output_str
+
+
+@pytest.mark.parametrize("strategy", ["truncate", "elide", "spill"])
+def test_zero_limit_keeps_only_the_note(strategy, tmp_path):
+    budget = OutputBudget(strategy=strategy, blob_store=LocalBlobStore(tmp_path))
+
+    fitted = budget.fit("z" * 100, 0)
+
+    assert "z" not in fitted
+    assert "100 tokens" in fitted
+
+
+@pytest.mark.asyncio
+async def test_zero_tool_limit_is_applied():
+    budget = OutputBudget(max_tokens=1000, tool_limits={"search": 0})
+
+    response = await budget.apply(SearchTool(), ToolResponse(output={"results": "r" * 500}))
+
+    assert "r" * 10 not in response.output_str
+
+
+def test_checkpointed_thread_needs_persistent_blob_store(tmp_path):
+    from fast_agents import Checkpointer, FileCheckpointStore
+    from fast_agents.exceptions import ConfigurationException
+
+    checkpointer = Checkpointer(FileCheckpointStore(tmp_path / "checkpoints"))
+    with pytest.raises(ConfigurationException):
+        _thread([], output_budget=OutputBudget(strategy="spill"), checkpointer=checkpointer)
+
+    _thread([], output_budget=OutputBudget(strategy="spill", blob_store=LocalBlobStore(tmp_path / "blobs")), checkpointer=checkpointer)
+
+
+def test_elide_keeps_head_and_tail():
+    budget = OutputBudget(strategy="elide")
+
+    elided = budget.fit("a" * 100 + "b" * 100, 20)
+
+    assert elided.startswith("a" * 10 + "\n")
+    assert elided.endswith("\n" + "b" * 10)
+    assert "180 of 200 tokens elided" in elided
+
+
+@pytest.mark.asyncio
+async def test_spilled_output_is_paged_with_retrieval_tool(tmp_path):
+    budget = OutputBudget(max_tokens=40, strategy="spill", blob_store=LocalBlobStore(tmp_path), page_tokens=200)
+    thread = _thread([_call_response("unlimited_search"), text_response()], tool=UnlimitedSearchTool, output_budget=budget)
+
+    await thread.run_to_completion()
+
+    output = _tool_output(thread)
+    ref = output.split('ref "')[1].split('"')[0]
+    assert "page 1 to 3" in output
+    assert READ_TOOL_NAME in [tool["name"] for tool in thread.client.responses.create.call_args.kwargs["tools"]]
+
+    read = thread.client.responses.create
+    read.side_effect = [
+        MockResponse([MockResponseOutputItem(item_type="function_call", name=READ_TOOL_NAME, arguments=json.dumps({"ref": ref, "page": 3}), call_id="call_2")]),
+        text_response(),
+    ]
+    await thread.run_to_completion()
+
+    full = ToolResponse(output={"results": "r" * 500}).output_str
+    assert json.loads(_tool_output(thread, "call_2"))["output"]["message"] == f"[page 3 of 3]\n{full[400:]}"
+
+
+def test_blob_store_rejects_unknown_refs(tmp_path):
+    store = LocalBlobStore(tmp_path)
+    ref = store.put("data")
+
+    assert store.get(ref) == "data"
+    assert store.get("../../etc/passwd") is None
+    assert store.get("0" * 24) is None
@@ -0,0 +1,217 @@
+"""
+Tests for the request rate limiter.
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import openai
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from fast_agents import Agent, RetryPolicy, Thread
+from fast_agents.rate_limiter import RateLimiter
+from tests.conftest import MockResponse, MockResponseOutputItem
+
+
+class FakeClock:
+    """Limiter clock that only moves when the test advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.mark.asyncio
+async def test_priority_classes_are_served_first():
+    limiter = RateLimiter(tokens_per_minute=60_000)   # 1000 tokens/s
+    await limiter.acquire(60_000)
+
+    order = []
+
+    async def request(name, priority):
+        await limiter.acquire(100, priority)
+        order.append(name)
+
+    await asyncio.gather(request("low", 1), request("high", 0), request("low2", 1))
+
+    assert order == ["high", "low", "low2"]
+
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_spacing():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=600, clock=clock)   # 10 requests/s once the burst is used
+    limiter.requests.level = 0
+
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.15)
+    assert not waiting.done()   # its timer fired, but the limiter's clock did not move
+
+    clock.advance(0.1)
+    await asyncio.wait_for(waiting, 5)
+    assert limiter.requests.level == pytest.approx(0)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_corrects_estimate():
+    limiter = RateLimiter(tokens_per_minute=6_000, clock=FakeClock())
+
+    reserved = await limiter.acquire(1_000)
+    limiter.reconcile(reserved, 3_000)
+
+    assert limiter.tokens.level == 3_000
+
+
+@pytest.mark.asyncio
+async def test_thread_requests_go_through_limiter(monkeypatch):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10_000, clock=FakeClock())
+    agent = Agent(name="test_agent", instructions="i", model="gpt-4")
+    thread = Thread(agent=agent, input=[{"role": "user", "content": "hi"}], rate_limiter=limiter, priority=1)
+    monkeypatch.setattr(thread, "estimate_request_tokens", lambda params: 500)
+
+    response = MockResponse([MockResponseOutputItem(item_type="text", content="hello")])
+    response.usage = MagicMock(total_tokens=2_000)
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(return_value=response)
+
+    await thread.run_to_completion()
+
+    assert limiter.requests.level == 59
+    assert limiter.tokens.level == 8_000
+
+
+def test_request_estimate_counts_instructions_tools_history_and_contexts(monkeypatch):
+    from fast_agents import Tool, ToolResponse
+    from pydantic import BaseModel
+
+    monkeypatch.setattr("fast_agents.thread.count_tokens_many", lambda strings, encoding_name=None: [len(s) for s in strings])
+    monkeypatch.setattr("fast_agents.history.count_tokens_many", lambda strings, encoding_name=None: [len(s) for s in strings])
+    monkeypatch.setattr("fast_agents.tool_registry.count_tokens_many", lambda strings, encoding_name=None: [len(s) for s in strings])
+
+    class LookupSchema(BaseModel):
+        key: str
+
+    class LookupTool(Tool):
+        name = "lookup"
+        description = "Look up a key"
+        schema = LookupSchema
+
+        async def handle(self, key: str, **kwargs) -> ToolResponse:
+            return ToolResponse(output=key)
+
+    agent = Agent(name="test_agent", instructions="be brief", model="gpt-4", tools=[LookupTool()])
+    thread = Thread(agent=agent, input=[{"role": "user", "content": "hi"}])
+    thread._contexts = "context"
+    params = {"model": "gpt-4", "instructions": "be brief", "tools": thread.tool_definitions(), "input": list(thread.input)}
+
+    tools_json = json.dumps(list(agent.tool_registry.definitions), default=str)
+    expected = len("be brief") + len(tools_json) + len(thread.input.serialized(0)) + len("context")
+    assert thread.estimate_request_tokens(params) == expected
+
+    # Tool definitions are serialized and counted once per registry
+    monkeypatch.setattr("fast_agents.tool_registry.count_tokens_many", None)
+    assert thread.estimate_request_tokens(params) == expected
+
+
+class FakeServer:
+    """
+    Enforces RPM/TPM limits like the API: continuously refilled budgets, starting exhausted,
+    and 429 responses with `retry-after-ms` for requests over either of them.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, request_tokens, clock=time.monotonic):
+        self.rates = {"requests": requests_per_minute / 60, "tokens": tokens_per_minute / 60}
+        self.levels = {"requests": 0.0, "tokens": 0.0}
+        self.request_tokens = request_tokens
+        self.clock = clock   # the limiter's clock, so both measure the same intervals
+        self.updated = clock()
+        self.accepted = 0
+        self.rejected = 0
+        self.early_retries = 0
+        self.retry_at = {}   # caller -> time its retry-after ends
+
+    async def create(self, **params):
+        now = self.clock()
+        for name, rate in self.rates.items():
+            self.levels[name] += (now - self.updated) * rate
+        self.updated = now
+
+        caller = params["input"][0]["content"]
+        if now + 0.001 < self.retry_at.pop(caller, 0):   # timers may fire within clock resolution
+            self.early_retries += 1
+
+        cost = {"requests": 1, "tokens": self.request_tokens}
+        # 1% slack for timer resolution
+        wait = max((cost[name] * 0.99 - self.levels[name]) / self.rates[name] for name in cost)
+        if wait > 0:
+            self.rejected += 1
+            self.retry_at[caller] = now + wait
+            request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+            raise openai.RateLimitError("rate limited", response=httpx.Response(429, headers={"retry-after-ms": str(wait * 1000)}, request=request), body=None)
+
+        for name in cost:
+            self.levels[name] -= cost[name]
+        self.accepted += 1
+        response = MockResponse([MockResponseOutputItem(item_type="text", content="ok")])
+        response.usage = MagicMock(total_tokens=self.request_tokens)
+        return response
+
+
+class RecordingRetryPolicy(RetryPolicy):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = []
+
+    def delay_for(self, error, attempt):
+        delay = super().delay_for(error, attempt)
+        self.delays.append(delay)
+        return delay
+
+
+async def _run_threads(server, count, **kwargs):
+    agent = Agent(name="test_agent", instructions="i", model="gpt-4")
+    threads = []
+    for i in range(count):
+        thread = Thread(agent=agent, input=[{"role": "user", "content": f"request {i}"}], **kwargs)
+        thread.estimate_request_tokens = lambda params: server.request_tokens
+        thread.client = MagicMock()
+        thread.client.responses.create = AsyncMock(side_effect=server.create)
+        threads.append(thread)
+
+    outputs = await asyncio.gather(*(thread.run_to_completion() for thread in threads))
+    assert [output.content for output in outputs] == ["ok"] * count
+
+
+@pytest.mark.asyncio
+async def test_limiter_keeps_concurrent_threads_within_server_limits():
+    server = FakeServer(requests_per_minute=1_200, tokens_per_minute=120_000, request_tokens=100)   # 20 requests/s
+    limiter = RateLimiter(requests_per_minute=1_200, tokens_per_minute=120_000)
+    limiter.requests.level = limiter.tokens.level = 0
+
+    await _run_threads(server, 8, rate_limiter=limiter, retry_policy=RetryPolicy(initial_delay=0.01))
+
+    assert server.rejected == 0
+    assert server.accepted == 8
+
+
+@pytest.mark.asyncio
+async def test_retries_wait_for_server_retry_after():
+    server = FakeServer(requests_per_minute=1_200, tokens_per_minute=60_000, request_tokens=100)   # 10 requests/s
+    policy = RecordingRetryPolicy(max_attempts=20, initial_delay=10, jitter=False)
+
+    await _run_threads(server, 4, retry_policy=policy)
+
+    assert server.rejected > 0
+    assert server.early_retries == 0
+    assert server.accepted == 4
+    # Every retry waited for the server's retry-after, never for the policy's own 10s+ backoff
+    assert len(policy.delays) == server.rejected
+    assert all(delay < 10 for delay in policy.delays)
@@ -0,0 +1,118 @@
+"""
+Tests for request retries and model fallbacks.
+"""
+
+import httpx
+import openai
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from fast_agents import Agent, Thread, RetryPolicy
+from fast_agents.exceptions import StreamingFailedException
+from tests.conftest import MockResponse, MockResponseOutputItem
+
+
+def _status_error(cls, status, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    return cls("error", response=httpx.Response(status, headers=headers, request=request), body=None)
+
+
+def _thread(**kwargs):
+    agent = Agent(name="test_agent", instructions="i", model="gpt-4", fallback_models=["gpt-4o-mini"])
+    return Thread(agent=agent, input=[{"role": "user", "content": "hi"}], **kwargs)
+
+
+def test_retryable_errors():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(_status_error(openai.RateLimitError, 429))
+    assert policy.is_retryable(_status_error(openai.InternalServerError, 503))
+    assert policy.is_retryable(StreamingFailedException())
+    assert not policy.is_retryable(_status_error(openai.BadRequestError, 400))
+    assert not policy.is_retryable(ValueError())
+
+
+def test_retry_after_headers_take_precedence():
+    policy = RetryPolicy(initial_delay=10, jitter=False)
+
+    assert policy.delay_for(_status_error(openai.RateLimitError, 429, {"retry-after-ms": "250"}), 1) == 0.25
+    assert policy.delay_for(_status_error(openai.RateLimitError, 429, {"retry-after": "2"}), 1) == 2
+    assert policy.delay_for(_status_error(openai.RateLimitError, 429), 2) == 20
+
+
+def test_backoff_is_capped_and_jittered():
+    policy = RetryPolicy(initial_delay=1, max_delay=5)
+
+    assert all(0 <= policy.backoff(10) <= 5 for _ in range(20))
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_request_is_retried():
+    thread = _thread(retry_policy=RetryPolicy(initial_delay=0.01))
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(side_effect=[
+        _status_error(openai.RateLimitError, 429),
+        MockResponse([MockResponseOutputItem(item_type="text", content="hello")]),
+    ])
+
+    await thread.run_to_completion()
+
+    models = [call.kwargs["model"] for call in thread.client.responses.create.call_args_list]
+    assert models == ["gpt-4", "gpt-4"]
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_returns_reserved_tokens(monkeypatch):
+    from fast_agents import RateLimiter
+
+    limiter = RateLimiter(tokens_per_minute=60_000)
+    thread = _thread(retry_policy=RetryPolicy(initial_delay=0.01), rate_limiter=limiter)
+    monkeypatch.setattr(thread, "estimate_request_tokens", lambda params: 10_000)
+    response = MockResponse([MockResponseOutputItem(item_type="text", content="hello")])
+    response.usage = MagicMock(total_tokens=10_000)
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(side_effect=[_status_error(openai.RateLimitError, 429), response])
+
+    await thread.run_to_completion()
+
+    assert limiter.tokens.level == pytest.approx(50_000, abs=50)
+
+
+@pytest.mark.asyncio
+async def test_overloaded_model_falls_back():
+    thread = _thread(retry_policy=RetryPolicy())
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(side_effect=[
+        _status_error(openai.InternalServerError, 529),
+        MockResponse([MockResponseOutputItem(item_type="text", content="hello")]),
+    ])
+
+    await thread.run_to_completion()
+
+    models = [call.kwargs["model"] for call in thread.client.responses.create.call_args_list]
+    assert models == ["gpt-4", "gpt-4o-mini"]
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    thread = _thread(retry_policy=RetryPolicy(max_attempts=2, initial_delay=0.01))
+    thread.agent.fallback_models = []
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(side_effect=_status_error(openai.RateLimitError, 429))
+
+    with pytest.raises(openai.RateLimitError):
+        await thread.run_to_completion()
+
+    assert thread.client.responses.create.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_no_retries_without_policy():
+    thread = _thread()
+    thread.client = MagicMock()
+    thread.client.responses.create = AsyncMock(side_effect=_status_error(openai.InternalServerError, 503))
+
+    with pytest.raises(openai.InternalServerError):
+        await thread.run_to_completion()
+
+    assert thread.client.responses.create.call_count == 1
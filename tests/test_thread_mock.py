@@ -55,7 +55,7 @@ class TestThreadWithMocking:
         ])
         
         # Mock the AsyncOpenAI client creation and response
-        with patch('fast_agents.thread.AsyncOpenAI') as mock_openai_class:
+        with patch('fast_agents.client_provider.AsyncOpenAI') as mock_openai_class:
             mock_client = MagicMock()
             mock_client.responses.create = AsyncMock(return_value=mock_response)
             mock_openai_class.return_value = mock_client
@@ -71,4 +71,264 @@ class TestThreadWithMocking:
             
             # Verify the client was called
             mock_client.responses.create.assert_called_once()
-            
\ No newline at end of file
+            
+    @pytest.mark.asyncio
+    async def test_thread_normalizes_response_items_on_ingestion(self):
+        """Response items are stored as wire-format dicts without id/status."""
+
+        agent = Agent(name="test_agent", instructions="You are a test assistant.", model="gpt-4")
+        original_input = [{"role": "user", "content": "hi", "id": "msg_1"}]
+        thread = Thread(agent=agent, input=original_input, keep_response_objects=True)
+
+        item = MockResponseOutputItem(item_type="message", content="Hello!")
+        item.id = "msg_2"
+        item.status = "completed"
+
+        with patch('fast_agents.client_provider.AsyncOpenAI') as mock_openai_class:
+            mock_client = MagicMock()
+            mock_client.responses.create = AsyncMock(return_value=MockResponse([item]))
+            mock_openai_class.return_value = mock_client
+
+            outputs = [output async for output in thread.run()]
+
+        assert outputs == [item]
+        assert thread.input == [
+            {"role": "user", "content": "hi"},
+            {"type": "message", "content": "Hello!", "name": None, "arguments": {}, "call_id": None},
+        ]
+        assert thread.response_objects == [item]
+        # Caller's input is left untouched
+        assert original_input == [{"role": "user", "content": "hi", "id": "msg_1"}]
+
+    @pytest.mark.asyncio
+    async def test_thread_multi_turn_tool_loop(self):
+        """Several tool rounds are driven by one flat loop and end with the final answer."""
+        from pydantic import BaseModel
+
+        class EchoSchema(BaseModel):
+            message: str
+
+        class EchoTool(Tool):
+            name = "echo"
+            description = "Echo tool"
+            schema = EchoSchema
+
+            async def handle(self, message: str, **kwargs) -> ToolResponse:
+                return ToolResponse(output={"echo": message})
+
+        agent = Agent(name="test_agent", instructions="Echo things.", model="gpt-4", tools=[EchoTool()])
+        thread = Thread(agent=agent, input=[], max_turns=5)
+
+        tool_turns = [
+            MockResponse([MockResponseOutputItem(item_type="function_call", name="echo", arguments=f'{{"message": "m{i}"}}', call_id=f"call_{i}")])
+            for i in range(3)
+        ]
+        final = MockResponse([MockResponseOutputItem(item_type="text", content="done")])
+
+        with patch('fast_agents.client_provider.AsyncOpenAI') as mock_openai_class:
+            mock_client = MagicMock()
+            mock_client.responses.create = AsyncMock(side_effect=[*tool_turns, final])
+            mock_openai_class.return_value = mock_client
+
+            outputs = [output async for output in thread.run()]
+
+        assert mock_client.responses.create.call_count == 4
+        assert thread.turn_count == 4
+        assert [o["call_id"] for o in outputs if isinstance(o, dict)] == ["call_0", "call_1", "call_2"]
+        assert outputs[-1].content == "done"
+
+    @pytest.mark.asyncio
+    async def test_tool_outputs_as_completed(self):
+        """Fast tools are yielded first while the input keeps call order."""
+        import asyncio
+        from pydantic import BaseModel
+
+        class SleepSchema(BaseModel):
+            delay: float
+
+        class SleepTool(Tool):
+            name = "sleep"
+            description = "Sleeps"
+            schema = SleepSchema
+
+            async def handle(self, delay: float, **kwargs) -> ToolResponse:
+                await asyncio.sleep(delay)
+                return ToolResponse(output={"slept": delay})
+
+        agent = Agent(name="test_agent", instructions="i", model="gpt-4", tools=[SleepTool()])
+        thread = Thread(agent=agent, input=[], tool_outputs_as_completed=True)
+
+        calls = MockResponse([
+            MockResponseOutputItem(item_type="function_call", name="sleep", arguments='{"delay": 0.05}', call_id="slow"),
+            MockResponseOutputItem(item_type="function_call", name="sleep", arguments='{"delay": 0}', call_id="fast"),
+        ])
+        final = MockResponse([MockResponseOutputItem(item_type="text", content="done")])
+
+        client = MagicMock()
+        client.responses.create = AsyncMock(side_effect=[calls, final])
+        thread.client = client
+
+        outputs = [output async for output in thread.run()]
+
+        yielded = [o["call_id"] for o in outputs if isinstance(o, dict)]
+        stored = [i["call_id"] for i in thread.input if i.get("type") == "function_call_output"]
+        assert yielded == ["fast", "slow"]
+        assert stored == ["slow", "fast"]
+
+    @pytest.mark.asyncio
+    async def test_chain_responses_sends_only_new_items(self):
+        """With chain_responses, follow-up turns send new items with previous_response_id."""
+        from pydantic import BaseModel
+
+        class EchoSchema(BaseModel):
+            message: str
+
+        class EchoTool(Tool):
+            name = "echo"
+            description = "Echo tool"
+            schema = EchoSchema
+
+            async def handle(self, message: str, **kwargs) -> ToolResponse:
+                return ToolResponse(output={"echo": message})
+
+        agent = Agent(name="test_agent", instructions="i", model="gpt-4", tools=[EchoTool()])
+        thread = Thread(agent=agent, input=[{"role": "user", "content": "hi"}], chain_responses=True)
+
+        first = MockResponse([MockResponseOutputItem(item_type="function_call", name="echo", arguments='{"message": "a"}', call_id="call_1")])
+        first.id = "resp_1"
+        second = MockResponse([MockResponseOutputItem(item_type="text", content="done")])
+        second.id = "resp_2"
+
+        client = MagicMock()
+        client.responses.create = AsyncMock(side_effect=[first, second])
+        thread.client = client
+
+        await thread.run_to_completion()
+
+        first_call, second_call = client.responses.create.call_args_list
+        assert "previous_response_id" not in first_call.kwargs
+        assert len(first_call.kwargs["input"]) == 1
+        assert second_call.kwargs["previous_response_id"] == "resp_1"
+        assert [i["type"] for i in second_call.kwargs["input"]] == ["function_call_output"]
+        assert thread.previous_response_id == "resp_2"
+
+        # A different agent breaks the chain and the full history is sent again
+        thread.agent = Agent(name="other", instructions="i", model="gpt-4")
+        thread.input.append({"role": "user", "content": "again"})
+        third = MockResponse([MockResponseOutputItem(item_type="text", content="ok")])
+        third.id = "resp_3"
+        client.responses.create = AsyncMock(return_value=third)
+
+        await thread.run_to_completion()
+
+        assert "previous_response_id" not in client.responses.create.call_args.kwargs
+        assert len(client.responses.create.call_args.kwargs["input"]) == len(thread.input) - 1
+
+    @pytest.mark.asyncio
+    async def test_cache_friendly_layout(self):
+        """Contexts go after the history and a prompt_cache_key is derived from instructions and tools."""
+        from fast_agents import LlmContext
+        from fast_agents.helpers import PromptCacheStatsHook
+
+        class ClockContext(LlmContext):
+            async def get_content(self) -> str:
+                return "12:00"
+
+        agent = Agent(name="test_agent", instructions="i", model="gpt-4")
+        stats = PromptCacheStatsHook()
+        thread = Thread(agent=agent, input=[{"role": "user", "content": "hi"}], llm_contexts=[ClockContext()],
+                        hooks=[stats], cache_friendly_layout=True)
+
+        response = MockResponse([MockResponseOutputItem(item_type="text", content="hello")])
+        response.usage = MagicMock(input_tokens=100, input_tokens_details=MagicMock(cached_tokens=80))
+        client = MagicMock()
+        client.responses.create = AsyncMock(return_value=response)
+        thread.client = client
+
+        await thread.run_to_completion()
+
+        kwargs = client.responses.create.call_args.kwargs
+        assert kwargs["input"][0] == {"role": "user", "content": "hi"}
+        assert kwargs["input"][-1]["role"] == "system"
+        assert kwargs["prompt_cache_key"] == Thread(agent=agent, cache_friendly_layout=True).get_prompt_cache_key()
+        assert stats.turns == [{"turn": 1, "input_tokens": 100, "cached_tokens": 80}]
+        assert stats.hit_rate == 0.8
+
+        agent.instructions = "changed"
+        assert thread.get_prompt_cache_key() != kwargs["prompt_cache_key"]
+
+    @pytest.mark.asyncio
+    async def test_overlap_turn_preparation(self):
+        """LlmContexts for the next turn are fetched while tools are still running."""
+        import asyncio
+        from pydantic import BaseModel
+        from fast_agents import LlmContext
+
+        events = []
+
+        class EventsContext(LlmContext):
+            async def get_content(self) -> str:
+                events.append("context")
+                return "ctx"
+
+        class WaitSchema(BaseModel):
+            pass
+
+        class WaitTool(Tool):
+            name = "wait"
+            description = "Waits"
+            schema = WaitSchema
+
+            async def handle(self, **kwargs) -> ToolResponse:
+                events.append("tool_start")
+                await asyncio.sleep(0.02)
+                events.append("tool_end")
+                return ToolResponse(output="ok")
+
+        agent = Agent(name="test_agent", instructions="i", model="gpt-4", tools=[WaitTool()])
+        thread = Thread(agent=agent, input=[{"role": "user", "content": "hi"}], llm_contexts=[EventsContext()],
+                        overlap_turn_preparation=True)
+
+        client = MagicMock()
+        client.responses.create = AsyncMock(side_effect=[
+            MockResponse([MockResponseOutputItem(item_type="function_call", name="wait", arguments="{}", call_id="call_1")]),
+            MockResponse([MockResponseOutputItem(item_type="text", content="done")]),
+        ])
+        thread.client = client
+
+        await thread.run_to_completion()
+
+        assert events == ["context", "tool_start", "context", "tool_end"]
+        second_input = client.responses.create.call_args_list[1].kwargs["input"]
+        assert second_input[0]["role"] == "system"
+        assert [i.get("type") for i in second_input[1:]] == [None, "function_call", "function_call_output"]
+
+    @pytest.mark.asyncio
+    async def test_prepared_turn_is_cancelled_when_thread_stops(self):
+        """A prepared turn that is never used does not outlive the run, so the thread can be forked afterwards."""
+        from pydantic import BaseModel
+        from fast_agents.exceptions import MaxTurnsReachedException
+
+        class WaitSchema(BaseModel):
+            pass
+
+        class WaitTool(Tool):
+            name = "wait"
+            description = "Waits"
+            schema = WaitSchema
+
+            async def handle(self, **kwargs) -> ToolResponse:
+                return ToolResponse(output="ok")
+
+        agent = Agent(name="test_agent", instructions="i", model="gpt-4", tools=[WaitTool()])
+        thread = Thread(agent=agent, input=[{"role": "user", "content": "hi"}], max_turns=0, overlap_turn_preparation=True)
+        thread.client = MagicMock()
+        thread.client.responses.create = AsyncMock(return_value=MockResponse([
+            MockResponseOutputItem(item_type="function_call", name="wait", arguments="{}", call_id="call_1")
+        ]))
+
+        with pytest.raises(MaxTurnsReachedException):
+            await thread.run_to_completion()
+
+        assert thread._prepared_turn is None
+        assert len(thread.fork(2)) == 2
@@ -2,6 +2,8 @@
 Tests for Thread.stream streaming behavior with mocked OpenAI client.
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import MagicMock, patch
 
@@ -30,6 +32,7 @@ class _AsyncStreamContext:
         return await self._aiter.__anext__()
 
     async def get_final_response(self):
+        await asyncio.sleep(0.01)   # like a network stream, speculatively started tools run meanwhile
         return self._final
 
 
@@ -63,7 +66,7 @@ async def test_stream_text_events():
     ]
     final = _MockFinalResponse([_MockResponseItem(item_type="message", content_text="Hello")])
 
-    with patch("fast_agents.thread.AsyncOpenAI") as mock_cls:
+    with patch("fast_agents.client_provider.AsyncOpenAI") as mock_cls:
         mock_client = MagicMock()
         mock_client.responses.stream.return_value = _AsyncStreamContext(events, final)
         mock_cls.return_value = mock_client
@@ -120,7 +123,7 @@ async def test_stream_function_call_events_and_tool_flow():
 
     # Mock the OpenAI client: first stream call returns the function call,
     # second recursive stream call returns no events and a simple final message.
-    with patch("fast_agents.thread.AsyncOpenAI") as mock_cls:
+    with patch("fast_agents.client_provider.AsyncOpenAI") as mock_cls:
         mock_client = MagicMock()
         mock_client.responses.stream.side_effect = [
             _AsyncStreamContext(events, final),
@@ -142,3 +145,115 @@ async def test_stream_function_call_events_and_tool_flow():
     assert mock_client.responses.stream.call_count == 2
 
 
+
+def _echo_agent(calls, stall=None):
+    from pydantic import BaseModel
+    from fast_agents import Tool, ToolResponse
+
+    class EchoSchema(BaseModel):
+        message: str
+
+    class EchoTool(Tool):
+        name = "echo"
+        description = "Echo tool"
+        schema = EchoSchema
+        async def handle(self, message: str, **kwargs) -> ToolResponse:
+            calls.append(message)
+            if message == stall:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    calls.append(f"{message} cancelled")
+                    raise
+            return ToolResponse(output={"echo": message})
+
+    return Agent(name="s", instructions="i", model="gpt-4o", tools=[EchoTool()])
+
+
+def _function_call_events(arguments):
+    return [
+        type("E", (), {
+            "type": "response.output_item.added",
+            "output_index": 0,
+            "item": type("I", (), {"type": "function_call", "id": "fc1", "call_id": "call_1", "name": "echo", "arguments": ""})(),
+        })(),
+        type("E", (), {"type": "response.function_call_arguments.done", "output_index": 0, "arguments": arguments})(),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_speculative_tool_execution_reuses_started_call():
+    calls = []
+    thread = Thread(agent=_echo_agent(calls), input=[{"role": "user", "content": "call tool"}], speculative_tool_execution=True)
+
+    final = _MockFinalResponse([
+        _MockResponseItem(item_type="function_call", name="echo", arguments="{\"message\":\"hi\"}", call_id="call_1")
+    ])
+    client = MagicMock()
+    client.responses.stream.side_effect = [
+        _AsyncStreamContext(_function_call_events("{\"message\":\"hi\"}"), final),
+        _AsyncStreamContext([], _MockFinalResponse([_MockResponseItem(item_type="message", content_text="ok")])),
+    ]
+    thread.client = client
+
+    outputs = [out async for out in thread.stream()]
+
+    assert calls == ["hi"]
+    assert any(isinstance(o, dict) and o.get("type") == "function_call_output" for o in outputs)
+
+
+@pytest.mark.asyncio
+async def test_stream_speculative_call_replaced_when_final_differs():
+    calls = []
+    thread = Thread(agent=_echo_agent(calls, stall="hi"), input=[{"role": "user", "content": "call tool"}], speculative_tool_execution=True)
+
+    final = _MockFinalResponse([
+        _MockResponseItem(item_type="function_call", name="echo", arguments="{\"message\":\"bye\"}", call_id="call_1")
+    ])
+    client = MagicMock()
+    client.responses.stream.side_effect = [
+        _AsyncStreamContext(_function_call_events("{\"message\":\"hi\"}"), final),
+        _AsyncStreamContext([], _MockFinalResponse([_MockResponseItem(item_type="message", content_text="ok")])),
+    ]
+    thread.client = client
+
+    outputs = [out async for out in thread.stream()]
+
+    fn_outputs = [o for o in outputs if isinstance(o, dict) and o.get("type") == "function_call_output"]
+    assert len(fn_outputs) == 1
+    assert "bye" in fn_outputs[0]["output"]
+    # The replaced call is cancelled before the confirmed one runs, not when the turn ends
+    assert calls == ["hi", "hi cancelled", "bye"]
+
+
+@pytest.mark.asyncio
+async def test_stream_retry_does_not_rerun_started_tools():
+    from fast_agents import RetryPolicy
+    from fast_agents.retry_policy import StreamRetryEvent
+
+    calls = []
+    thread = Thread(agent=_echo_agent(calls), input=[{"role": "user", "content": "call tool"}],
+                    speculative_tool_execution=True, retry_policy=RetryPolicy(initial_delay=0.01))
+
+    failed = _function_call_events("{\"message\":\"hi\"}") + [type("E", (), {"type": "response.failed", "error": "server_error"})()]
+    final = _MockFinalResponse([
+        _MockResponseItem(item_type="function_call", name="echo", arguments="{\"message\":\"hi\"}", call_id="call_1")
+    ])
+    client = MagicMock()
+    client.responses.stream.side_effect = [
+        _AsyncStreamContext(failed, None),
+        _AsyncStreamContext(_function_call_events("{\"message\":\"hi\"}"), final),
+        _AsyncStreamContext([], _MockFinalResponse([_MockResponseItem(item_type="message", content_text="ok")])),
+    ]
+    thread.client = client
+
+    outputs = [out async for out in thread.stream()]
+
+    assert client.responses.stream.call_count == 3
+    assert calls == ["hi"]
+    retries = [i for i, o in enumerate(outputs) if isinstance(o, StreamRetryEvent)]
+    assert len(retries) == 1
+    attempt = [event.type for event in _function_call_events("{\"message\":\"hi\"}")]
+    assert [getattr(o, "type", None) for o in outputs[:retries[0]]] == attempt
+    assert [getattr(o, "type", None) for o in outputs[retries[0] + 1:retries[0] + 1 + len(attempt)]] == attempt
+    assert any(isinstance(o, dict) and o.get("type") == "function_call_output" for o in outputs)
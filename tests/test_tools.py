@@ -112,3 +112,104 @@ class TestToolResponse:
         assert "test" in output_str
         assert "[Error]" not in output_str
 
+
+
+class TestToolScheduler:
+    """Test cases for bounded tool execution."""
+
+    @staticmethod
+    def make_tool(limit=None, seconds=None):
+        import asyncio
+
+        class SlowSchema(BaseModel):
+            delay: float = 0.0
+
+        class SlowTool(Tool):
+            name = "slow"
+            description = "Sleeps"
+            schema = SlowSchema
+            max_concurrency = limit
+            timeout = seconds
+            running = 0
+            peak = 0
+
+            async def handle(self, delay: float = 0.0, **kwargs) -> ToolResponse:
+                SlowTool.running += 1
+                SlowTool.peak = max(SlowTool.peak, SlowTool.running)
+                try:
+                    await asyncio.sleep(delay)
+                finally:
+                    SlowTool.running -= 1
+                return ToolResponse(output="done")
+
+        return SlowTool
+
+    @pytest.mark.asyncio
+    async def test_per_tool_concurrency_limit(self):
+        import asyncio
+        from fast_agents import ToolScheduler
+
+        tool_cls = self.make_tool(limit=2)
+        scheduler = ToolScheduler()
+
+        await asyncio.gather(*[scheduler.run(tool_cls(), lambda: tool_cls().arun(run_context=None, delay=0.01)) for _ in range(6)])
+
+        assert tool_cls.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_global_limit_and_override(self):
+        import asyncio
+        from fast_agents import ToolScheduler
+
+        tool_cls = self.make_tool(limit=5)
+        scheduler = ToolScheduler(max_concurrency=3, tool_limits={"slow": 1})
+
+        await asyncio.gather(*[scheduler.run(tool_cls(), lambda: tool_cls().arun(run_context=None, delay=0.01)) for _ in range(4)])
+
+        assert tool_cls.peak == 1
+
+    @pytest.mark.asyncio
+    async def test_saturated_tool_does_not_hold_global_slots(self):
+        import asyncio
+        from fast_agents import ToolScheduler
+
+        slow_cls = self.make_tool(limit=1)
+
+        class FastTool(slow_cls):
+            name = "fast"
+            max_concurrency = None
+
+        scheduler = ToolScheduler(max_concurrency=2)
+        finished = []
+
+        async def run(tool_cls, delay):
+            await scheduler.run(tool_cls(), lambda: tool_cls().arun(run_context=None, delay=delay))
+            finished.append(tool_cls.name)
+
+        await asyncio.gather(*[run(slow_cls, 0.05) for _ in range(3)], run(FastTool, 0))
+
+        assert finished[0] == "fast"
+
+    @pytest.mark.asyncio
+    async def test_timeout_error_of_tool_is_not_a_scheduler_timeout(self):
+        from fast_agents import ToolScheduler
+
+        tool_cls = self.make_tool(seconds=5)
+
+        async def call():
+            raise TimeoutError("upstream timed out")
+
+        with pytest.raises(TimeoutError, match="upstream"):
+            await ToolScheduler().run(tool_cls(), call)
+
+    @pytest.mark.asyncio
+    async def test_timeout_returns_error_response(self):
+        from fast_agents import ToolScheduler
+
+        tool_cls = self.make_tool(seconds=0.01)
+
+        response = await ToolScheduler().run(tool_cls(), lambda: tool_cls().arun(run_context=None, delay=1))
+
+        assert response.is_error is True
+        assert "timed out" in response.output_str
+        assert tool_cls.running == 0